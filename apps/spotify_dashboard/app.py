@@ -8,14 +8,21 @@ import streamlit as st
 # Import configuration and styling
 from config import PAGE_CONFIG
 from styles import CUSTOM_CSS
+from utils import warm_up_warehouse, get_query_stats, keep_widget_state
+from cost_guard import get_cost_calibration, get_cost_guard_stats
 
-# Import tab modules
-from tabs import (
-    render_top_artists_year_tab,
-    render_top_songs_day_tab,
-    render_top_artists_region_tab,
-    render_chatbot_tab
-)
+import tabs
+
+
+# Tab label -> render function name; each tab module (and its plotly/pandas/sdk
+# imports) is loaded the first time the tab is opened
+TABS = {
+    "🎵 Top Artists by Year": "render_top_artists_year_tab",
+    "🎧 Top Songs by Day": "render_top_songs_day_tab",
+    "🌍 Top Artists by Region": "render_top_artists_region_tab",
+    "📈 Artist Trajectory": "render_artist_trajectory_tab",
+    "💬 AI Chat Assistant": "render_chatbot_tab"
+}
 
 
 def main():
@@ -24,6 +31,9 @@ def main():
     # Page configuration
     st.set_page_config(**PAGE_CONFIG)
     
+    # Build the workspace client and wake the warehouse in the background while the page renders
+    warm_up_warehouse()
+    
     # Apply custom CSS
     st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
     
@@ -32,26 +42,18 @@ def main():
     st.markdown('<p class="subtitle">Powered by Databricks Asset Bundles & Delta Live Tables</p>', unsafe_allow_html=True)
     st.markdown("---")
     
-    # Create tabs
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "🎵 Top Artists by Year",
-        "🎧 Top Songs by Day", 
-        "🌍 Top Artists by Region",
-        "💬 AI Chat Assistant"
-    ])
-    
-    # Render each tab
-    with tab1:
-        render_top_artists_year_tab()
-    
-    with tab2:
-        render_top_songs_day_tab()
-    
-    with tab3:
-        render_top_artists_region_tab()
-    
-    with tab4:
-        render_chatbot_tab()
+    # Tab navigation: only the selected tab's body runs on each rerun, so the
+    # other tabs' filters are kept in session state instead of their widgets
+    keep_widget_state()
+    with st.container(key="nav"):
+        active_tab = st.radio(
+            "Navigation",
+            options=list(TABS.keys()),
+            horizontal=True,
+            label_visibility="collapsed",
+            key="active_tab"
+        )
+    getattr(tabs, TABS[active_tab])()
     
     # Footer
     st.markdown("---")
@@ -63,10 +65,23 @@ def main():
         </p>
         <p style='font-size: 0.8rem; margin-top: 10px;'>
             📊 Data Source: <code>spotify_dev.prod_schema</code> | 
-            🎯 Tables: daily_chart_positions, monthly_artist_performance, monthly_top_100_artists
+            🎯 Tables: daily_chart_positions, monthly_artist_performance, monthly_top_100_artists, artist_daily_trajectory
         </p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Warehouse load: executions vs. identical concurrent queries that shared one execution
+    stats = get_query_stats()
+    st.caption(f"⚡ Warehouse queries: {stats['executions']} executed, {stats['coalesced']} duplicates coalesced")
+    
+    # Ad-hoc SQL cost guard: estimated scan vs. actual run time, for tuning the budget
+    guard = get_cost_guard_stats()
+    if guard['checked']:
+        with st.expander(
+            f"🛡️ Cost guard: {guard['checked']} checked, {guard['rejected']} rejected over budget, "
+            f"{guard['unestimated']} rejected unestimated"
+        ):
+            st.dataframe(get_cost_calibration(), use_container_width=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+"""
+First-click latency of the dashboard's SQL path, measured against a local stub server
+
+The stub speaks just enough of the Statement Execution API to simulate a stopped warehouse
+(cold start on the first statement) and per-connection setup cost (TLS handshake). It compares:
+  - cold:      the user's first query starts the warehouse
+  - warmed:    the startup warm-up ping runs while the user is still reading the page
+  - follow-up: a second query on the pooled keep-alive connection
+
+    python benchmarks/first_click.py --cold-start 3 --connect-latency 0.2 --think-time 2
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection import build_workspace_client, start_warehouse_heartbeat, stop_warehouse_heartbeat  # noqa: E402
+
+WAREHOUSE_ID = "stub-warehouse"
+
+
+class StubWarehouse:
+    """Warehouse state shared by all requests: stopped until the first statement arrives"""
+
+    def __init__(self, cold_start, connect_latency):
+        self.cold_start = cold_start
+        self.connect_latency = connect_latency
+        self.ready_at = None
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def wait_until_ready(self):
+        with self.lock:
+            if self.ready_at is None:
+                self.ready_at = time.monotonic() + self.cold_start
+            ready_at = self.ready_at
+        time.sleep(max(0.0, ready_at - time.monotonic()))
+
+    def is_ready(self):
+        with self.lock:
+            if self.ready_at is None:
+                self.ready_at = time.monotonic() + self.cold_start
+            return time.monotonic() >= self.ready_at
+
+
+def make_handler(warehouse):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            # Runs once per TCP connection; stands in for TCP + TLS setup
+            warehouse.connections += 1
+            time.sleep(warehouse.connect_latency)
+            super().setup()
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if request.get("wait_timeout") == "0s":
+                state = "SUCCEEDED" if warehouse.is_ready() else "PENDING"
+                self._reply({"statement_id": "ping", "status": {"state": state}})
+                return
+            warehouse.wait_until_ready()
+            self._reply({
+                "statement_id": "query",
+                "status": {"state": "SUCCEEDED"},
+                "manifest": {"schema": {"columns": [{"name": "value", "position": 0}]}},
+                "result": {"data_array": [["1"]]}
+            })
+
+    return Handler
+
+
+def run_query(w):
+    started = time.perf_counter()
+    w.statement_execution.execute_statement(
+        statement="SELECT DISTINCT year FROM monthly_artist_performance",
+        warehouse_id=WAREHOUSE_ID,
+        wait_timeout="50s"
+    )
+    return time.perf_counter() - started
+
+
+def measure(args, warm_up):
+    """Start a fresh stub (stopped warehouse) and time the user's first and second query"""
+    warehouse = StubWarehouse(args.cold_start, args.connect_latency)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(warehouse))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        w = build_workspace_client(host=f"http://127.0.0.1:{server.server_port}", token="stub-token", auth_type="pat")
+        if warm_up:
+            start_warehouse_heartbeat(lambda: w, WAREHOUSE_ID, interval=0)
+        # Time the user spends on the page before clicking "Load"
+        time.sleep(args.think_time)
+        first = run_query(w)
+        second = run_query(w)
+        return first, second, warehouse.connections
+    finally:
+        stop_warehouse_heartbeat()
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cold-start", type=float, default=3.0, help="Simulated warehouse start time (s)")
+    parser.add_argument("--connect-latency", type=float, default=0.2, help="Simulated per-connection setup time (s)")
+    parser.add_argument("--think-time", type=float, default=2.0, help="Delay between page load and first click (s)")
+    args = parser.parse_args()
+
+    # The stub doesn't serve host metadata; the SDK falls back to the explicit config
+    logging.getLogger("databricks.sdk").setLevel(logging.ERROR)
+
+    for label, warm_up in (("cold (no warm-up)", False), ("warmed at startup", True)):
+        first, second, connections = measure(args, warm_up)
+        print(f"{label:<20} first click {first * 1000:>8.0f} ms | follow-up {second * 1000:>6.0f} ms | "
+              f"connections opened {connections}")
+
+
+if __name__ == "__main__":
+    main()
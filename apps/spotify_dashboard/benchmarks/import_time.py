@@ -0,0 +1,84 @@
+"""
+Import-time profile of the dashboard's cold start
+
+Runs each entry point in a fresh interpreter with `python -X importtime` and reports
+the total import time plus the slowest modules. Run it from the app directory after
+each redeploy of spotify-dashboard-app and append the results to a log to track trends:
+
+    python benchmarks/import_time.py --runs 5 --json import_times.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What runs before first paint, then what each tab adds on first open
+ENTRY_POINTS = [
+    ("app (first paint)", "import app"),
+    ("tab: top artists by year", "import app; import tabs.top_artists_year"),
+    ("tab: top songs by day", "import app; import tabs.top_songs_day"),
+    ("tab: top artists by region", "import app; import tabs.top_artists_region"),
+    ("tab: artist trajectory", "import app; import tabs.artist_trajectory"),
+    ("tab: chatbot", "import app; import tabs.chatbot"),
+]
+
+
+def profile_imports(statement):
+    """Import `statement` in a fresh interpreter; return {module: cumulative_us}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line.split("|", 2)
+        # Nested imports are indented two spaces per level; only top-level entries add up to the total
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        cumulative[module.strip()] = (int(cumulative_us), depth)
+    return cumulative
+
+
+def total_ms(profile):
+    return sum(us for us, depth in profile.values() if depth == 0) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per entry point (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list for the first-paint import")
+    parser.add_argument("--json", metavar="PATH", help="Append results as one JSON line to PATH")
+    args = parser.parse_args()
+
+    results = {}
+    slowest = []
+    for label, statement in ENTRY_POINTS:
+        profiles = [profile_imports(statement) for _ in range(args.runs)]
+        results[label] = statistics.median(total_ms(p) for p in profiles)
+        print(f"{label:<30} {results[label]:>9.1f} ms")
+        if not slowest:
+            slowest = sorted(profiles[-1].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+
+    print("\nSlowest modules imported before first paint:")
+    for module, (us, _) in slowest:
+        print(f"  {us / 1000:>9.1f} ms  {module}")
+
+    if args.json:
+        record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "runs": args.runs, "import_ms": results}
+        with open(args.json, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Chart helpers for the Spotify Analytics Dashboard
+Prepares datasets once per load and caches built figure specs across reruns
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from config import CHART_MAX_POINTS, CHART_CACHE_ENTRIES
+
+
+def prepare_ranked_frame(df, value_col, extra_numeric_cols=()):
+    """
+    Convert a freshly loaded frame for charting: numeric value columns,
+    sorted descending by value_col. Run once per load, not per rerun.
+    Returns (ranked_df, dataset_version) where the version keys cached figures.
+    """
+    ranked = df.copy()
+    for col in (value_col, *extra_numeric_cols):
+        if col in ranked.columns:
+            ranked[col] = pd.to_numeric(ranked[col], errors='coerce')
+    ranked = ranked.sort_values(value_col, ascending=False, kind='stable').reset_index(drop=True)
+    dataset_version = str(pd.util.hash_pandas_object(ranked, index=False).sum())
+    return ranked, dataset_version
+
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES)
+def bar_chart_spec(_df, dataset_version, category_col, value_col, display_count,
+                   horizontal, color_scale, height, labels, hover_cols=()):
+    """
+    Build a top-N bar chart figure spec from a ranked frame.
+    _df is not hashed; dataset_version plus the display params form the cache key.
+    """
+    top = _df.head(display_count)
+
+    fig = px.bar(
+        top,
+        x=value_col if horizontal else category_col,
+        y=category_col if horizontal else value_col,
+        orientation='h' if horizontal else 'v',
+        hover_data=list(hover_cols) or None,
+        labels=labels,
+        color=value_col,
+        color_continuous_scale=color_scale,
+        height=height
+    )
+    if horizontal:
+        fig.update_layout(
+            showlegend=False,
+            yaxis={'categoryorder': 'total ascending'},
+            xaxis_title=labels.get(value_col, value_col),
+            yaxis_title=""
+        )
+    else:
+        fig.update_layout(
+            xaxis_tickangle=-45,
+            showlegend=False,
+            xaxis_title=labels.get(category_col, category_col),
+            yaxis_title=labels.get(value_col, value_col)
+        )
+    return fig.to_dict()
+
+
+def prepare_series_frame(df, x_col, numeric_cols):
+    """
+    Convert a freshly loaded time series for charting: datetime x column,
+    numeric value columns, sorted by time. Returns (series_df, dataset_version).
+    """
+    series = df.copy()
+    series[x_col] = pd.to_datetime(series[x_col], errors='coerce')
+    for col in numeric_cols:
+        series[col] = pd.to_numeric(series[col], errors='coerce')
+    series = series.dropna(subset=[x_col]).sort_values(x_col, kind='stable').reset_index(drop=True)
+    dataset_version = str(pd.util.hash_pandas_object(series, index=False).sum())
+    return series, dataset_version
+
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES)
+def line_chart_spec(_df, dataset_version, x_col, y_cols, labels, height, reverse_y=False, max_points=CHART_MAX_POINTS):
+    """
+    Build a time-series line chart spec, downsampled to max_points on the app server.
+    _df is not hashed; dataset_version plus the display params form the cache key.
+    """
+    y_cols = list(y_cols)
+    points = downsample_series(_df, x_col, y_cols[0], max_points)
+
+    fig = px.line(
+        points,
+        x=x_col,
+        y=y_cols,
+        labels=labels,
+        height=height
+    )
+    fig.update_layout(
+        legend_title_text="",
+        xaxis_title=labels.get(x_col, x_col),
+        yaxis_title=labels.get(y_cols[0], y_cols[0]) if len(y_cols) == 1 else "",
+        hovermode="x unified"
+    )
+    fig.for_each_trace(lambda trace: trace.update(name=labels.get(trace.name, trace.name)))
+    if reverse_y:
+        fig.update_yaxes(autorange="reversed")
+    return fig.to_dict()
+
+
+def downsample_series(df, x_col, y_col, max_points=CHART_MAX_POINTS):
+    """
+    Reduce a time series to at most max_points rows with Largest-Triangle-Three-Buckets,
+    keeping peaks and troughs visible. df must be sorted by x_col.
+    """
+    n = len(df)
+    if max_points < 3 or n <= max_points:
+        return df
+
+    x_values = df[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x_values):
+        x = x_values.astype('int64').to_numpy(dtype=float)
+    else:
+        x = pd.to_numeric(x_values, errors='coerce').to_numpy(dtype=float)
+    y = pd.to_numeric(df[y_col], errors='coerce').fillna(0).to_numpy(dtype=float)
+
+    # First and last points are always kept; the rest is split into equal buckets
+    bucket_edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = np.empty(max_points, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+
+    for i in range(max_points - 2):
+        start, end = bucket_edges[i], bucket_edges[i + 1]
+        next_start = end
+        next_end = bucket_edges[i + 2] if i + 2 < len(bucket_edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Keep the point forming the largest triangle with the previous pick and next bucket average
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return df.iloc[selected]
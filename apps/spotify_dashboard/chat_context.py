@@ -0,0 +1,115 @@
+"""
+Token-budgeted conversation context for the AI Chat Assistant
+Keeps the prompt sent to the model bounded regardless of conversation length
+"""
+
+from config import CATALOG, SCHEMA, CHAT_CONTEXT_TOKEN_BUDGET, CHAT_SUMMARY_TOKEN_BUDGET
+
+
+# Schema description is static, so build it once at import instead of every turn
+SCHEMA_CONTEXT = f"""You are a helpful AI assistant for Spotify Charts Analytics.
+
+You have access to the following data:
+- Catalog: {CATALOG}, Schema: {SCHEMA}
+- Tables:
+  1. daily_chart_positions: Contains daily chart positions with columns like chart_date, title, artist, rank, region, streams, trend
+  2. monthly_artist_performance: Monthly aggregated metrics with columns like artist, region, year, month, total_streams, avg_rank, best_rank, chart_appearances, unique_songs
+  3. monthly_top_100_artists: Top 100 artists per region per month"""
+
+SYSTEM_CONTEXT = f"""{SCHEMA_CONTEXT}
+
+When users ask about the data, provide helpful insights. If they ask for specific data queries, explain what SQL query would be needed. Be conversational and helpful."""
+
+# Rough average for Llama-style tokenizers on English text
+CHARS_PER_TOKEN = 4
+
+# Longest excerpt of a single dropped turn kept in the summary
+SUMMARY_EXCERPT_CHARS = 160
+
+
+def count_tokens(text):
+    """Approximate the number of tokens in a piece of text"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _message_tokens(message):
+    """Token count for a chat message, cached on the message itself"""
+    if "tokens" not in message:
+        message["tokens"] = count_tokens(message["content"])
+    return message["tokens"]
+
+
+def _truncate(text, max_tokens):
+    """Cut text down to roughly max_tokens, keeping the beginning"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 3)] + "..."
+
+
+def summarize_turns(messages, max_tokens=CHAT_SUMMARY_TOKEN_BUDGET):
+    """Build a compact extractive summary of turns dropped from the context"""
+    header = "Summary of earlier conversation:"
+    lines = [header]
+    used = count_tokens(header)
+
+    # Most recent dropped turns are the most relevant, so fill from the end
+    for message in reversed(messages):
+        excerpt = " ".join(message["content"].split())[:SUMMARY_EXCERPT_CHARS]
+        speaker = "User asked" if message["role"] == "user" else "Assistant answered"
+        line = f"- {speaker}: {excerpt}"
+        line_tokens = count_tokens(line) + 1
+        if used + line_tokens > max_tokens:
+            break
+        lines.insert(1, line)
+        used += line_tokens
+
+    if len(lines) == 1:
+        return ""
+    return "\n".join(lines)
+
+
+def build_context_messages(chat_messages, budget=CHAT_CONTEXT_TOKEN_BUDGET, system_context=SYSTEM_CONTEXT):
+    """
+    Select the messages to send to the model for the next turn.
+
+    The newest turns are kept verbatim until the token budget is used up;
+    anything older is folded into a short summary appended to the system prompt.
+    Returns a list of {"role", "content"} dicts starting with the system message.
+    """
+    system_tokens = count_tokens(system_context)
+    summary_reserve = min(CHAT_SUMMARY_TOKEN_BUDGET, max(0, budget - system_tokens) // 4)
+    available = max(0, budget - system_tokens - summary_reserve)
+
+    kept = []
+    used = 0
+    index = len(chat_messages)
+    while index > 0:
+        message = chat_messages[index - 1]
+        tokens = _message_tokens(message)
+        if used + tokens > available:
+            if not kept:
+                # Always send the latest message, trimmed if it alone exceeds the budget
+                kept.append({"role": message["role"], "content": _truncate(message["content"], available)})
+                index -= 1
+            break
+        kept.append({"role": message["role"], "content": message["content"]})
+        used += tokens
+        index -= 1
+    kept.reverse()
+
+    # Chat endpoints expect the conversation to open with a user turn
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+        index += 1
+
+    system_content = system_context
+    dropped = chat_messages[:index]
+    if dropped:
+        summary = summarize_turns(dropped, summary_reserve)
+        if summary:
+            system_content = f"{system_context}\n\n{summary}"
+
+    return [{"role": "system", "content": system_content}] + kept
@@ -2,6 +2,8 @@
 Configuration and constants for the Spotify Analytics Dashboard
 """
 
+import os
+
 # Database configuration
 CATALOG = "spotify_dev"
 SCHEMA = "prod_schema"
@@ -9,6 +11,21 @@ SCHEMA = "prod_schema"
 # Default model endpoint
 DEFAULT_MODEL_ENDPOINT = "databricks-meta-llama-3-1-8b-instruct"
 
+# Chat context budget (approximate tokens sent to the model per turn)
+CHAT_CONTEXT_TOKEN_BUDGET = 2000
+CHAT_SUMMARY_TOKEN_BUDGET = 300
+CHAT_MAX_RESPONSE_TOKENS = 1000
+
+# Chat SQL tool: read-only queries the assistant may run against the gold/silver tables
+CHAT_SQL_TABLES = [
+    "daily_chart_positions",
+    "monthly_artist_performance",
+    "monthly_top_100_artists"
+]
+CHAT_SQL_MAX_ROWS = 50
+CHAT_SQL_MAX_RESULT_CHARS = 2000
+CHAT_SQL_MAX_ROUNDS = 2
+
 # Page configuration
 PAGE_CONFIG = {
     "page_title": "Spotify Charts Analytics",
@@ -17,3 +34,38 @@ PAGE_CONFIG = {
     "initial_sidebar_state": "collapsed"
 }
 
+
+# Chart rendering
+CHART_MAX_POINTS = 1000  # Time-series points per chart, roughly the plot's pixel width
+CHART_CACHE_ENTRIES = 200
+
+# Artist trajectory tab: upper bound on daily rows fetched for one artist/region
+TRAJECTORY_MAX_ROWS = 5000
+
+# Artist/track search index
+SEARCH_INDEX_MAX_ENTRIES = 50000  # per kind (artists, tracks)
+SEARCH_RESULTS_LIMIT = 10
+
+# Result export
+EXPORT_MAX_ROWS = 5000000
+EXPORT_CACHE_TTL = 600  # seconds an identical export is reused
+EXPORT_MAX_DOWNLOAD_BYTES = 200 * 1000 ** 2  # the download button holds the file in server memory
+
+# Warehouse connection: pooled keep-alive HTTP session and retries on transient errors
+HTTP_MAX_CONNECTIONS = 20
+HTTP_TIMEOUT_SECONDS = 60
+QUERY_RETRY_ATTEMPTS = 3
+QUERY_RETRY_BASE_DELAY = 0.5  # seconds, doubled per attempt
+
+# Warehouse heartbeat: keeps the warehouse warm during business hours (0 = warm up once at startup only)
+WAREHOUSE_HEARTBEAT_SECONDS = int(os.getenv("WAREHOUSE_HEARTBEAT_SECONDS", "240"))
+WAREHOUSE_HEARTBEAT_HOURS = (8, 19)  # local start hour inclusive, end hour exclusive
+WAREHOUSE_HEARTBEAT_WEEKDAYS = (0, 1, 2, 3, 4)  # Monday-Friday
+WAREHOUSE_HEARTBEAT_TIMEZONE = os.getenv("WAREHOUSE_HEARTBEAT_TIMEZONE", "UTC")
+
+# Cost guard for ad-hoc SQL (chat assistant): EXPLAIN-based scan estimate checked before execution.
+# The default budget rejects full scans of daily_chart_positions but admits the monthly gold tables.
+QUERY_COST_MAX_BYTES = int(os.getenv("QUERY_COST_MAX_BYTES", str(512 * 1024 ** 2)))
+QUERY_COST_MAX_ROWS = int(os.getenv("QUERY_COST_MAX_ROWS", "20000000"))
+QUERY_COST_EXPLAIN_TIMEOUT_SECONDS = 120  # covers a cold warehouse start; the query is rejected after this
+QUERY_COST_LOG_ENTRIES = 200  # estimate vs. actual run time records kept for calibration
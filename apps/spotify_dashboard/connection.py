@@ -0,0 +1,129 @@
+"""
+Warehouse connection management for the dashboard's SQL path
+Pooled keep-alive client, retries with backoff and a business-hours warehouse heartbeat
+"""
+
+from datetime import datetime
+import random
+import threading
+import time
+
+from config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_TIMEOUT_SECONDS,
+    QUERY_RETRY_ATTEMPTS,
+    QUERY_RETRY_BASE_DELAY,
+    WAREHOUSE_HEARTBEAT_SECONDS,
+    WAREHOUSE_HEARTBEAT_HOURS,
+    WAREHOUSE_HEARTBEAT_WEEKDAYS,
+    WAREHOUSE_HEARTBEAT_TIMEZONE
+)
+
+
+# Heartbeat thread state (one per app process)
+_heartbeat_thread = None
+_heartbeat_stop = threading.Event()
+_heartbeat_lock = threading.Lock()
+HEARTBEAT_STATS = {"pings": 0, "failures": 0, "last_ping": None}
+
+
+def build_workspace_client(**kwargs):
+    """
+    Workspace Client whose HTTP session keeps a pool of keep-alive connections,
+    so queries after the first reuse an open TLS connection.
+    """
+    from databricks.sdk import WorkspaceClient
+    from databricks.sdk.core import Config
+
+    config = Config(
+        max_connection_pools=HTTP_MAX_CONNECTIONS,
+        max_connections_per_pool=HTTP_MAX_CONNECTIONS,
+        http_timeout_seconds=HTTP_TIMEOUT_SECONDS,
+        **kwargs
+    )
+    return WorkspaceClient(config=config)
+
+
+def is_transient_error(error):
+    """Errors worth retrying: throttling, unavailability, timeouts and dropped connections"""
+    from databricks.sdk.errors import DeadlineExceeded, InternalError, TemporarilyUnavailable, TooManyRequests
+    import requests
+
+    return isinstance(error, (
+        DeadlineExceeded,
+        InternalError,
+        TemporarilyUnavailable,
+        TooManyRequests,
+        requests.ConnectionError,
+        requests.Timeout,
+        ConnectionError,
+        TimeoutError
+    ))
+
+
+def call_with_retries(fn, attempts=QUERY_RETRY_ATTEMPTS, base_delay=QUERY_RETRY_BASE_DELAY):
+    """Call fn(), retrying transient errors with exponential backoff and jitter"""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_transient_error(e):
+                raise
+            time.sleep(base_delay * (2 ** attempt) * (1 + random.random()))
+
+
+def in_business_hours(now=None):
+    """Whether the heartbeat should keep the warehouse warm right now"""
+    if now is None:
+        from zoneinfo import ZoneInfo
+        now = datetime.now(ZoneInfo(WAREHOUSE_HEARTBEAT_TIMEZONE))
+    start_hour, end_hour = WAREHOUSE_HEARTBEAT_HOURS
+    return now.weekday() in WAREHOUSE_HEARTBEAT_WEEKDAYS and start_hour <= now.hour < end_hour
+
+
+def ping_warehouse(get_client, warehouse_id):
+    """Submit a trivial statement without waiting, which starts a stopped warehouse and resets its idle timer"""
+    try:
+        get_client().statement_execution.execute_statement(
+            statement="SELECT 1",
+            warehouse_id=warehouse_id,
+            wait_timeout="0s"
+        )
+        HEARTBEAT_STATS["pings"] += 1
+        HEARTBEAT_STATS["last_ping"] = time.time()
+    except Exception:
+        HEARTBEAT_STATS["failures"] += 1
+
+
+def _heartbeat_loop(get_client, warehouse_id, interval):
+    # Warm up immediately: someone just opened the app. interval=None only warms up once.
+    ping_warehouse(get_client, warehouse_id)
+    while not _heartbeat_stop.wait(interval):
+        if in_business_hours():
+            ping_warehouse(get_client, warehouse_id)
+
+
+def start_warehouse_heartbeat(get_client, warehouse_id, interval=WAREHOUSE_HEARTBEAT_SECONDS):
+    """
+    Warm the warehouse now and, if interval > 0, keep pinging it every `interval`
+    seconds during business hours. Idempotent; runs in a daemon thread.
+    """
+    global _heartbeat_thread
+    if not warehouse_id:
+        return None
+    with _heartbeat_lock:
+        if _heartbeat_thread is None or not _heartbeat_thread.is_alive():
+            _heartbeat_stop.clear()
+            _heartbeat_thread = threading.Thread(
+                target=_heartbeat_loop,
+                args=(get_client, warehouse_id, interval if interval > 0 else None),
+                name="warehouse-heartbeat",
+                daemon=True
+            )
+            _heartbeat_thread.start()
+    return _heartbeat_thread
+
+
+def stop_warehouse_heartbeat():
+    """Stop the heartbeat thread (used by the benchmark)"""
+    _heartbeat_stop.set()
@@ -0,0 +1,195 @@
+"""
+Pre-execution cost guard for ad-hoc SQL
+Estimates bytes and rows scanned with EXPLAIN COST before a query reaches the warehouse,
+rejects queries over budget and logs estimates next to actual run times for calibration
+"""
+
+from collections import OrderedDict
+import re
+import threading
+import time
+
+import streamlit as st
+
+from config import CATALOG, SCHEMA, QUERY_COST_MAX_BYTES, QUERY_COST_MAX_ROWS, QUERY_COST_EXPLAIN_TIMEOUT_SECONDS, QUERY_COST_LOG_ENTRIES
+from connection import call_with_retries
+from utils import WAREHOUSE_ID, get_workspace_client, load_prepared, prepare_query
+
+
+# Pre-aggregated tables to point over-budget queries at
+GOLD_TABLES = ("monthly_artist_performance", "monthly_top_100_artists")
+
+_UNITS = {"": 1, "Ki": 1024, "Mi": 1024 ** 2, "Gi": 1024 ** 3, "Ti": 1024 ** 4, "Pi": 1024 ** 5, "Ei": 1024 ** 6}
+_STATISTICS_PATTERN = re.compile(
+    r"Statistics\(sizeInBytes=([\d.]+(?:E[+-]?\d+)?)\s*([KMGTPE]i)?B(?:,\s*rowCount=([\d.]+(?:E[+-]?\d+)?))?",
+    re.IGNORECASE
+)
+_RELATION_PATTERN = re.compile(r"\b\w*Relation\s+([`\w.]+)")
+# Spark reports Long.MaxValue (8.0 EiB) when a relation has no size statistics
+_UNKNOWN_SIZE = 8 * 1024 ** 6
+
+# Estimate vs. actual records keyed by normalized query, oldest first
+_calibration = OrderedDict()
+_calibration_lock = threading.Lock()
+COST_GUARD_STATS = {"checked": 0, "rejected": 0, "unestimated": 0}
+
+
+def _count(stat):
+    with _calibration_lock:
+        COST_GUARD_STATS[stat] += 1
+
+
+class QueryCostError(ValueError):
+    """Raised when a query's estimated scan exceeds the cost budget, or can't be estimated"""
+
+
+def _parse_statistics(line):
+    """(bytes, rows) from one plan node's Statistics(...), either may be None"""
+    match = _STATISTICS_PATTERN.search(line)
+    if not match:
+        return None, None
+    size = float(match.group(1)) * _UNITS[(match.group(2) or "").capitalize()]
+    rows = float(match.group(3)) if match.group(3) else None
+    return (size if size < _UNKNOWN_SIZE else None), rows
+
+
+def parse_explain_cost(plan):
+    """
+    Scan estimate from EXPLAIN COST output: the summed statistics of the leaf relations
+    in the optimized logical plan. Falls back to the root node when no relation is found.
+    """
+    optimized = plan.split("== Optimized Logical Plan ==", 1)[-1].split("== Physical Plan ==", 1)[0]
+    lines = [line for line in optimized.splitlines() if "Statistics(" in line]
+
+    leaves = [line for line in lines if _RELATION_PATTERN.search(line)]
+    stats = [_parse_statistics(line) for line in (leaves or lines[:1])]
+    sizes = [size for size, _ in stats]
+    rows = [count for _, count in stats]
+    return {
+        "bytes": sum(sizes) if sizes and None not in sizes else None,
+        "rows": sum(rows) if rows and None not in rows else None,
+        "tables": sorted({_RELATION_PATTERN.search(line).group(1).replace("`", "") for line in leaves})
+    }
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def estimate_query_cost(query):
+    """
+    Estimated bytes/rows scanned by a query, from the optimizer's table statistics.
+    EXPLAIN is polled until it finishes (a cold warehouse queues it as PENDING) and
+    cancelled after QUERY_COST_EXPLAIN_TIMEOUT_SECONDS. Raises if it fails or times out
+    (not cached, so a transient failure is retried next time).
+    """
+    from databricks.sdk.service.sql import StatementState
+
+    w = get_workspace_client()
+    deadline = time.monotonic() + QUERY_COST_EXPLAIN_TIMEOUT_SECONDS
+    response = call_with_retries(lambda: w.statement_execution.execute_statement(
+        statement=f"EXPLAIN COST {query}",
+        warehouse_id=WAREHOUSE_ID,
+        catalog=CATALOG,
+        schema=SCHEMA,
+        wait_timeout="30s"
+    ))
+    while response.status.state in (StatementState.PENDING, StatementState.RUNNING):
+        if time.monotonic() >= deadline:
+            # Don't leave the EXPLAIN queued on the warehouse once nobody is waiting for it
+            w.statement_execution.cancel_execution(response.statement_id)
+            raise TimeoutError(f"EXPLAIN did not finish within {QUERY_COST_EXPLAIN_TIMEOUT_SECONDS}s")
+        time.sleep(1)
+        response = w.statement_execution.get_statement(response.statement_id)
+
+    if response.status.state != StatementState.SUCCEEDED:
+        error_msg = f"EXPLAIN failed: {response.status.state}"
+        if response.status.error:
+            error_msg += f"\n{response.status.error.message}"
+        raise RuntimeError(error_msg)
+
+    rows = response.result.data_array if response.result and response.result.data_array else []
+    return parse_explain_cost("\n".join(str(cell) for row in rows for cell in row if cell is not None))
+
+
+def _record(query, estimate, **actual):
+    """
+    Store one estimate vs. actual record, replacing an older one for the same query.
+    A cache hit never replaces a record that has a measured run time.
+    """
+    with _calibration_lock:
+        previous = _calibration.get(query)
+        if actual.get("cached") and previous and previous["seconds"] is not None:
+            _calibration.move_to_end(query)
+            return
+        _calibration[query] = {
+            "query": query,
+            "estimated_bytes": estimate.get("bytes"),
+            "estimated_rows": estimate.get("rows"),
+            "seconds": actual.get("seconds"),
+            "rows_returned": actual.get("rows_returned"),
+            "cached": actual.get("cached", False),
+            "rejected": actual.get("rejected", False),
+            "recorded": time.time()
+        }
+        _calibration.move_to_end(query)
+        while len(_calibration) > QUERY_COST_LOG_ENTRIES:
+            _calibration.popitem(last=False)
+
+
+def format_bytes(size):
+    """Human-readable byte count, e.g. 1.2 GB"""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1000 or unit == "TB":
+            return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1000
+
+
+def check_query_cost(query, max_bytes=QUERY_COST_MAX_BYTES, max_rows=QUERY_COST_MAX_ROWS):
+    """
+    Estimate a normalized query's scan and raise QueryCostError if it is over budget.
+    Returns the estimate. Fails closed: a query whose cost can't be estimated (EXPLAIN
+    failed or timed out) is rejected with QueryCostError as well.
+    """
+    _count("checked")
+    try:
+        estimate = estimate_query_cost(query)
+    except Exception as e:
+        _count("unestimated")
+        raise QueryCostError(f"the query's cost could not be estimated, so it was not run ({e})") from e
+
+    reasons = []
+    if estimate["bytes"] is not None and estimate["bytes"] > max_bytes:
+        reasons.append(f"an estimated scan of {format_bytes(estimate['bytes'])} exceeds the {format_bytes(max_bytes)} budget")
+    if estimate["rows"] is not None and estimate["rows"] > max_rows:
+        reasons.append(f"an estimated {estimate['rows']:,.0f} rows scanned exceeds the {max_rows:,} row budget")
+    if reasons:
+        _count("rejected")
+        _record(query, estimate, rejected=True)
+        message = " and ".join(reasons)
+        if not any(table.endswith(GOLD_TABLES) for table in estimate["tables"]):
+            message += f"; use the pre-aggregated {' or '.join(GOLD_TABLES)} tables instead"
+        raise QueryCostError(message)
+    return estimate
+
+
+def load_data_guarded(query, limit=1000, max_bytes=QUERY_COST_MAX_BYTES, max_rows=QUERY_COST_MAX_ROWS):
+    """
+    load_data behind the cost guard, for SQL the app didn't write itself.
+    Raises QueryCostError before anything runs on the warehouse if the query is over budget.
+    """
+    query = prepare_query(query, limit)
+    estimate = check_query_cost(query, max_bytes, max_rows)
+    df, seconds = load_prepared(query)
+    # Only a fresh execution has a run time that belongs to this estimate
+    _record(query, estimate, seconds=seconds, rows_returned=len(df), cached=seconds is None)
+    return df
+
+
+def get_cost_calibration():
+    """Recorded estimate vs. actual run time entries, newest first"""
+    with _calibration_lock:
+        return [dict(entry) for entry in reversed(_calibration.values())]
+
+
+def get_cost_guard_stats():
+    """Queries checked, rejected over budget and rejected without an estimate (process-wide)"""
+    with _calibration_lock:
+        return dict(COST_GUARD_STATS)
@@ -0,0 +1,234 @@
+"""
+Streaming export of query results to Parquet or CSV
+Result chunks are fetched as Arrow batches and written straight to a file, so memory
+stays bounded by one chunk regardless of export size
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+
+import streamlit as st
+
+from config import CATALOG, SCHEMA, EXPORT_MAX_ROWS, EXPORT_CACHE_TTL, EXPORT_MAX_DOWNLOAD_BYTES, HTTP_TIMEOUT_SECONDS
+from connection import call_with_retries
+from utils import WAREHOUSE_ID, get_workspace_client, normalize_sql, persistent_widget, single_flight
+
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "spotify_dashboard_exports")
+
+EXPORT_FORMATS = {
+    "Parquet": ("parquet", "application/octet-stream"),
+    "CSV": ("csv", "text/csv")
+}
+
+# Finished exports shared across sessions: cache key -> stats dict (includes "path")
+_exports = {}
+_exports_lock = threading.Lock()
+
+
+def _wait_for_statement(w, response):
+    """Poll a statement until it leaves the PENDING/RUNNING states"""
+    from databricks.sdk.service.sql import StatementState
+
+    while response.status.state in (StatementState.PENDING, StatementState.RUNNING):
+        time.sleep(1)
+        response = w.statement_execution.get_statement(response.statement_id)
+
+    if response.status.state != StatementState.SUCCEEDED:
+        error_msg = f"Query failed: {response.status.state}"
+        if response.status.error:
+            error_msg += f"\n{response.status.error.message}"
+        raise RuntimeError(error_msg)
+    return response
+
+
+def manifest_schema(manifest):
+    """Arrow schema for a statement's result manifest (complex and unknown types as strings)"""
+    import pyarrow as pa
+
+    simple_types = {
+        "BOOLEAN": pa.bool_(), "BYTE": pa.int8(), "SHORT": pa.int16(), "INT": pa.int32(),
+        "LONG": pa.int64(), "FLOAT": pa.float32(), "DOUBLE": pa.float64(), "STRING": pa.string(),
+        "CHAR": pa.string(), "DATE": pa.date32(), "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+        "BINARY": pa.binary()
+    }
+    fields = []
+    for column in manifest.schema.columns if manifest and manifest.schema else []:
+        type_name = column.type_name.value if column.type_name else "STRING"
+        if type_name == "DECIMAL":
+            arrow_type = pa.decimal128(column.type_precision or 38, column.type_scale or 0)
+        else:
+            arrow_type = simple_types.get(type_name, pa.string())
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def iter_record_batches(query):
+    """
+    Execute a query and yield its result as Arrow record batches, one chunk at a time.
+    An empty result yields one empty batch with the manifest's schema.
+    """
+    import pyarrow as pa
+    from databricks.sdk.service.sql import Disposition, Format
+
+    w = get_workspace_client()
+    response = call_with_retries(lambda: w.statement_execution.execute_statement(
+        statement=query,
+        warehouse_id=WAREHOUSE_ID,
+        catalog=CATALOG,
+        schema=SCHEMA,
+        disposition=Disposition.EXTERNAL_LINKS,
+        format=Format.ARROW_STREAM,
+        wait_timeout="50s"
+    ))
+    response = _wait_for_statement(w, response)
+
+    result = response.result
+    yielded = False
+    while result is not None:
+        next_chunk_index = None
+        for link in result.external_links or []:
+            # Presigned URLs must be fetched without workspace auth headers, but some
+            # clouds require the headers returned alongside the link
+            request = urllib.request.Request(link.external_link, headers=link.http_headers or {})
+            with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT_SECONDS) as stream:
+                reader = pa.ipc.open_stream(stream)
+                for batch in reader:
+                    yielded = True
+                    yield batch
+            next_chunk_index = link.next_chunk_index
+        if next_chunk_index is None:
+            break
+        result = w.statement_execution.get_statement_result_chunk_n(response.statement_id, next_chunk_index)
+
+    if not yielded:
+        yield pa.RecordBatch.from_pylist([], schema=manifest_schema(response.manifest))
+
+
+def _write_export(query, extension, path):
+    """Stream query results into path; returns row and timing stats"""
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    started = time.perf_counter()
+    rows = 0
+    writer = None
+    # A private temp file per writer, renamed into place only once complete
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".partial")
+    os.close(fd)
+    try:
+        for batch in iter_record_batches(query):
+            if writer is None:
+                if extension == "parquet":
+                    writer = pq.ParquetWriter(tmp_path, batch.schema, compression="zstd")
+                else:
+                    writer = pa_csv.CSVWriter(tmp_path, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+        writer.close()
+        writer = None
+        os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    seconds = time.perf_counter() - started
+    size = os.path.getsize(path)
+    return {
+        "path": path,
+        "rows": rows,
+        "bytes": size,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "mb_per_second": size / 1_000_000 / seconds if seconds else 0.0,
+        "created": time.time()
+    }
+
+
+def _prune_exports():
+    """Delete expired export files so the temp directory doesn't grow without bound"""
+    now = time.time()
+    with _exports_lock:
+        expired = [key for key, stats in _exports.items() if now - stats["created"] >= EXPORT_CACHE_TTL]
+        for key in expired:
+            stats = _exports.pop(key)
+            try:
+                os.remove(stats["path"])
+            except OSError:
+                pass
+
+
+def export_query(query, file_format="Parquet"):
+    """
+    Export a query's full result (up to EXPORT_MAX_ROWS) to a local file.
+    Returns (stats, from_cache); an identical export newer than EXPORT_CACHE_TTL is reused.
+    """
+    extension, _ = EXPORT_FORMATS[file_format]
+    query = normalize_sql(query)
+    if "LIMIT" not in query.upper():
+        query = f"{query} LIMIT {EXPORT_MAX_ROWS}"
+
+    key = hashlib.sha256(f"{extension}\n{query}".encode()).hexdigest()[:32]
+    with _exports_lock:
+        cached = _exports.get(key)
+    if cached and time.time() - cached["created"] < EXPORT_CACHE_TTL and os.path.exists(cached["path"]):
+        return cached, True
+
+    def write():
+        _prune_exports()
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        stats = _write_export(query, extension, os.path.join(EXPORT_DIR, f"{key}.{extension}"))
+        with _exports_lock:
+            _exports[key] = stats
+        return stats
+
+    # Sessions exporting the same query at the same time share one write
+    return single_flight(f"export:{key}", write), False
+
+
+def render_export(query, file_stem, key):
+    """Export controls: pick a format, build the file, then offer it for download"""
+    with st.expander("⬇️ Export full result"):
+        file_format = st.radio("Format", options=list(EXPORT_FORMATS), horizontal=True, key=persistent_widget(f"{key}_format"))
+
+        if st.button("Prepare export", key=f"{key}_prepare"):
+            with st.spinner("Exporting..."):
+                try:
+                    stats, from_cache = export_query(query, file_format)
+                    st.session_state[f"{key}_export"] = (query, file_format, stats, from_cache)
+                except Exception as e:
+                    st.error(f"Export failed: {str(e)}")
+
+        # Only offer a prepared file if it belongs to the result currently shown
+        exported = st.session_state.get(f"{key}_export")
+        if exported and exported[0] == query:
+            _, exported_format, stats, from_cache = exported
+            extension, mime = EXPORT_FORMATS[exported_format]
+            if from_cache:
+                st.caption(f"♻️ Reused an export from {time.time() - stats['created']:.0f}s ago")
+            st.caption(
+                f"{stats['rows']:,} rows · {stats['bytes'] / 1_000_000:.1f} MB in {stats['seconds']:.1f}s "
+                f"({stats['rows_per_second']:,.0f} rows/s, {stats['mb_per_second']:.1f} MB/s)"
+            )
+            # The download button copies the file into server memory, so it is only
+            # rendered on the rerun where the user asks for it, and only for bounded sizes
+            if stats["bytes"] > EXPORT_MAX_DOWNLOAD_BYTES:
+                st.warning(
+                    f"Too large to download through the app (limit {EXPORT_MAX_DOWNLOAD_BYTES / 1_000_000:.0f} MB). "
+                    "Narrow the selection and export again."
+                )
+            elif st.button(f"Get {exported_format} download", key=f"{key}_link") and os.path.exists(stats["path"]):
+                with open(stats["path"], "rb") as f:
+                    st.download_button(
+                        f"Download {exported_format}",
+                        data=f,
+                        file_name=f"{file_stem}.{extension}",
+                        mime=mime,
+                        key=f"{key}_download"
+                    )
@@ -0,0 +1,139 @@
+"""
+Prefix search over artist and track names
+A sorted-array index built once per table version and shared across sessions
+"""
+
+from bisect import bisect_left
+import heapq
+import unicodedata
+
+import streamlit as st
+
+from config import CATALOG, SCHEMA, SEARCH_INDEX_MAX_ENTRIES, SEARCH_RESULTS_LIMIT
+from utils import load_data, persistent_widget
+
+
+# Prefixes up to this length match too many names to rank per keystroke, so their results are precomputed
+SHORT_PREFIX_LENGTH = 2
+
+
+def normalize_name(text):
+    """Case-fold, strip accents and collapse whitespace so 'Beyoncé' matches 'beyonce'"""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+def _word_starts(name):
+    """Offsets of every word in a normalized name, so 'swift' finds 'taylor swift'"""
+    return [0] + [i + 1 for i, ch in enumerate(name) if ch == " "]
+
+
+class PrefixIndex:
+    """
+    Popularity-ranked prefix index over names.
+
+    Every word suffix of each normalized name is stored in one sorted list; a query
+    is a bisect range lookup. Results for very short prefixes are precomputed.
+    """
+
+    def __init__(self, entries, short_results=SEARCH_RESULTS_LIMIT):
+        # entries: iterable of (name, kind, popularity, label)
+        self.entries = [(name, kind, float(popularity or 0), label) for name, kind, popularity, label in entries]
+
+        keyed = []
+        entry_keys = []
+        for entry_id, (name, _, _, _) in enumerate(self.entries):
+            normalized = normalize_name(name)
+            keys = {normalized[start:] for start in _word_starts(normalized)}
+            entry_keys.append(keys)
+            keyed.extend((key, entry_id) for key in keys)
+        keyed.sort()
+        self._keys = [key for key, _ in keyed]
+        self._ids = [entry_id for _, entry_id in keyed]
+
+        # Top results per (kind, short prefix), filled in popularity order
+        self._short = {}
+        by_popularity = sorted(range(len(self.entries)), key=lambda i: self.entries[i][2], reverse=True)
+        for entry_id in by_popularity:
+            kind = self.entries[entry_id][1]
+            prefixes = {key[:length] for key in entry_keys[entry_id] for length in range(1, SHORT_PREFIX_LENGTH + 1)}
+            for prefix in prefixes:
+                for bucket in (self._short.setdefault((None, prefix), []), self._short.setdefault((kind, prefix), [])):
+                    if len(bucket) < short_results:
+                        bucket.append(entry_id)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=SEARCH_RESULTS_LIMIT, kind=None):
+        """Return up to `limit` (name, kind, popularity, label) entries whose words start with `query`"""
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            ids = self._short.get((kind, prefix), [])[:limit]
+            return [self.entries[i] for i in ids]
+
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + "\uffff", lo)
+        matches = {entry_id for entry_id in self._ids[lo:hi] if kind is None or self.entries[entry_id][1] == kind}
+        top = heapq.nlargest(limit, matches, key=lambda i: self.entries[i][2])
+        return [self.entries[i] for i in top]
+
+
+def get_table_version():
+    """Version token for the chart data: the last pipeline refresh time (re-checked at most every load_data TTL)"""
+    refreshed = load_data(f"SELECT MAX(last_updated) AS version FROM {CATALOG}.{SCHEMA}.monthly_artist_performance")
+    if refreshed.empty:
+        return None
+    return str(refreshed['version'].iloc[0])
+
+
+@st.cache_resource(max_entries=2, show_spinner="Building search index...")
+def get_search_index(table_version):
+    """
+    Build the artist/track index for one table version; shared by every session.
+    Each kind is capped separately so popular tracks can't crowd long-tail artists out.
+    """
+    query = f"""
+    SELECT name, kind, popularity, label FROM (
+        SELECT artist AS name, 'artist' AS kind, SUM(streams) AS popularity, artist AS label
+        FROM {CATALOG}.{SCHEMA}.daily_chart_positions
+        GROUP BY artist
+        UNION ALL
+        SELECT title AS name, 'track' AS kind, SUM(streams) AS popularity, CONCAT(title, ' - ', artist) AS label
+        FROM {CATALOG}.{SCHEMA}.daily_chart_positions
+        GROUP BY title, artist
+    )
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY kind ORDER BY popularity DESC) <= {SEARCH_INDEX_MAX_ENTRIES}
+    ORDER BY popularity DESC
+    LIMIT {2 * SEARCH_INDEX_MAX_ENTRIES}
+    """
+    df = load_data(query)
+    return PrefixIndex(df[['name', 'kind', 'popularity', 'label']].itertuples(index=False, name=None) if not df.empty else [])
+
+
+def search_box(label, key, kind=None):
+    """Type-ahead search widget; returns the selected entry's name, the typed name if nothing matches, or None"""
+    query = st.text_input(label, key=persistent_widget(f"{key}_query"), placeholder="Start typing a name...")
+    if not query:
+        return None
+
+    version = get_table_version()
+    if version is None:
+        return None
+    results = get_search_index(version).search(query, kind=kind)
+    if not results:
+        # The index holds the most popular names only; fall back to an exact-name lookup
+        st.caption("No matches in the search index, using the name as typed")
+        return query.strip()
+
+    selected = st.selectbox(
+        "Matches",
+        options=results,
+        format_func=lambda entry: f"{entry[3]} ({entry[1]})" if kind is None else entry[3],
+        key=persistent_widget(f"{key}_match")
+    )
+    return selected[0] if selected else None
@@ -0,0 +1,226 @@
+"""
+Read-only SQL tool for the AI Chat Assistant
+Validates model-proposed queries, checks their estimated cost and runs them through the cached load_data path
+"""
+
+import re
+
+from config import CATALOG, SCHEMA, CHAT_SQL_TABLES, CHAT_SQL_MAX_ROWS, CHAT_SQL_MAX_RESULT_CHARS
+from chat_context import SCHEMA_CONTEXT
+from cost_guard import QueryCostError, load_data_guarded
+from utils import SQL_STRING_LITERAL, normalize_sql
+
+
+SQL_TOOL_CONTEXT = f"""{SCHEMA_CONTEXT}
+
+You can run read-only SQL against the tables above to ground your answers in real data.
+When you need data, reply with ONLY one fenced ```sql code block containing a single SELECT statement and nothing else.
+Rules: Databricks SQL dialect, SELECT only, use only {", ".join(CHAT_SQL_TABLES)}, return at most {CHAT_SQL_MAX_ROWS} rows and aggregate where possible.
+Prefer the monthly tables: queries that would scan too much of daily_chart_positions are rejected.
+The app will run the query and send you the results; then answer the user's question in plain language using those results."""
+
+FORBIDDEN_KEYWORDS = {
+    "INSERT", "UPDATE", "DELETE", "MERGE", "DROP", "CREATE", "ALTER", "TRUNCATE",
+    "GRANT", "REVOKE", "COPY", "OPTIMIZE", "VACUUM", "CALL", "SET",
+    "USE", "REFRESH", "MSCK", "ANALYZE", "CACHE", "UNCACHE", "INTO", "EXECUTE"
+}
+
+# Functions with side effects, outside access or secret values
+FORBIDDEN_FUNCTIONS = {
+    "secret", "try_secret", "list_secrets", "http_request", "remote_query", "vector_search",
+    "read_files", "read_kafka", "read_kinesis", "read_pubsub", "read_pulsar", "read_statestore",
+    "reflect", "java_method", "try_reflect"
+}
+FORBIDDEN_FUNCTION_PREFIXES = ("ai_",)
+
+_SQL_BLOCK_PATTERN = re.compile(r"```sql\s*(.+?)```", re.IGNORECASE | re.DOTALL)
+# Identifiers (optionally dotted and backquoted), parentheses, commas and any other single character
+_TOKEN_PATTERN = re.compile(r"(?:`[^`]*`|\w+)(?:\s*\.\s*(?:`[^`]*`|\w+))*|[(),]|[^\s\w]")
+# Functions whose argument syntax uses FROM, e.g. EXTRACT(YEAR FROM chart_date)
+_FROM_FUNCTIONS = {"EXTRACT", "TRIM", "SUBSTRING", "POSITION", "OVERLAY"}
+# Clauses that end a FROM list; commas after them no longer separate relations
+_FROM_LIST_END = {
+    "WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "OFFSET", "QUALIFY", "WINDOW", "UNION", "INTERSECT",
+    "EXCEPT", "MINUS", "CLUSTER", "DISTRIBUTE", "SORT", "SELECT", "VIEW", "PIVOT", "UNPIVOT"
+}
+# Backquoted identifiers (kept) and string literals (blanked), matched in one left-to-right scan
+# so a quote inside an identifier can't open a fake literal
+_QUOTED_PATTERN = re.compile(rf"(`[^`]*`)|{SQL_STRING_LITERAL.pattern}")
+_LIMIT_PATTERN = re.compile(r"\bLIMIT\s+(\d+|ALL)(\s+OFFSET\s+\d+)?\s*$", re.IGNORECASE)
+_OFFSET_PATTERN = re.compile(r"\bOFFSET\s+\d+\s*$", re.IGNORECASE)
+
+
+class SqlValidationError(ValueError):
+    """Raised when a model-proposed query is not allowed to run"""
+
+
+def extract_sql(text):
+    """Return the first fenced ```sql block in a model response, or None"""
+    if not text:
+        return None
+    match = _SQL_BLOCK_PATTERN.search(text)
+    return match.group(1).strip() if match else None
+
+
+def strip_sql(text):
+    """Remove fenced ```sql blocks from a model response"""
+    return _SQL_BLOCK_PATTERN.sub("", text or "").strip()
+
+
+def _scan_references(code):
+    """
+    Walk a query's tokens (string literals already blanked) and return
+    (relations, functions, cte_names): every relation in a FROM list or JOIN,
+    comma-separated ones included, every function called and the names the WITH clause defines.
+    """
+    tokens = _TOKEN_PATTERN.findall(code)
+    relations, functions, cte_names = [], [], set()
+
+    # Per parenthesis depth: whether commas separate relations, and whether FROM is a function argument
+    in_from_list = [False]
+    from_is_argument = [False]
+    expecting_relation = False
+    # WITH name AS (...), name AS (...) SELECT|FROM ...: a CTE name comes right after WITH / RECURSIVE
+    # or after the comma that follows a CTE body, and the clause ends at the main query
+    in_with = bool(tokens) and tokens[0].upper() == "WITH"
+    expecting_cte_name = False
+
+    for i, token in enumerate(tokens):
+        upper = token.upper()
+        next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if token == "(":
+            previous = tokens[i - 1].upper() if i else ""
+            from_is_argument.append(previous in _FROM_FUNCTIONS)
+            in_from_list.append(False)
+            expecting_relation = False
+            continue
+        if token == ")":
+            if len(in_from_list) > 1:
+                in_from_list.pop()
+                from_is_argument.pop()
+            continue
+
+        depth = len(in_from_list) - 1
+        if in_with and depth == 0:
+            previous = tokens[i - 1] if i else ""
+            if upper in ("SELECT", "FROM"):
+                in_with = False
+            elif upper in ("WITH", "RECURSIVE"):
+                expecting_cte_name = True
+                continue
+            elif token == "," and previous == ")":
+                expecting_cte_name = True
+                continue
+            elif expecting_cte_name:
+                expecting_cte_name = False
+                name = token.replace("`", "").lower()
+                if "." not in name:
+                    cte_names.add(name)
+                continue
+
+        if expecting_relation:
+            if upper in ("LATERAL", "TABLE", "ONLY"):
+                continue
+            expecting_relation = False
+            if upper != "VALUES" and (token[0].isalpha() or token[0] in "_`"):
+                relations.append(token)
+                continue
+
+        if upper in ("FROM", "JOIN") and not from_is_argument[-1]:
+            in_from_list[-1] = True
+            expecting_relation = True
+        elif token == "," and in_from_list[-1]:
+            expecting_relation = True
+        elif upper in _FROM_LIST_END:
+            in_from_list[-1] = False
+        elif next_token == "(" and (token[0].isalpha() or token[0] in "_`"):
+            functions.append(token)
+
+    return relations, functions, cte_names
+
+
+def validate_sql(sql, max_rows=CHAT_SQL_MAX_ROWS):
+    """
+    Check that a query is a single read-only SELECT over the allow-listed tables
+    and return its normalized form with a LIMIT of at most max_rows.
+    Raises SqlValidationError otherwise.
+    """
+    if not sql or not sql.strip():
+        raise SqlValidationError("Empty query")
+
+    query = normalize_sql(sql)
+    code = _QUOTED_PATTERN.sub(lambda match: match.group(1) or "''", query)
+
+    if ";" in code:
+        raise SqlValidationError("Only a single statement is allowed")
+
+    first_word = code.split(None, 1)[0].upper()
+    if first_word not in ("SELECT", "WITH"):
+        raise SqlValidationError("Only SELECT queries are allowed")
+
+    words = set(re.findall(r"[A-Za-z_]+", code.upper()))
+    forbidden = sorted(words & FORBIDDEN_KEYWORDS)
+    if forbidden:
+        raise SqlValidationError(f"Keyword not allowed: {forbidden[0]}")
+
+    relations, functions, cte_names = _scan_references(code)
+
+    for function in functions:
+        name = "".join(function.replace("`", "").split()).lower()
+        if "." in name:
+            raise SqlValidationError(f"Only built-in functions are allowed: {function}")
+        if name in FORBIDDEN_FUNCTIONS or name.startswith(FORBIDDEN_FUNCTION_PREFIXES):
+            raise SqlValidationError(f"Function not allowed: {function}")
+
+    allowed_prefixes = ("", f"{SCHEMA}.", f"{CATALOG}.{SCHEMA}.")
+    if not relations:
+        raise SqlValidationError("Query must read from one of the available tables")
+    for ref in relations:
+        name = "".join(ref.replace("`", "").split()).lower()
+        if name in cte_names:
+            continue
+        if not any(name == f"{prefix}{table}" for prefix in allowed_prefixes for table in CHAT_SQL_TABLES):
+            raise SqlValidationError(f"Table not allowed: {ref}")
+
+    # Clamp a trailing LIMIT (keeping any OFFSET after it), or add one before a trailing OFFSET / at the end
+    limit_match = _LIMIT_PATTERN.search(query)
+    offset_match = _OFFSET_PATTERN.search(query)
+    if limit_match:
+        limit = limit_match.group(1)
+        if limit.upper() == "ALL" or int(limit) > max_rows:
+            query = f"{query[:limit_match.start()]}LIMIT {max_rows}{limit_match.group(2) or ''}"
+    elif offset_match:
+        query = f"{query[:offset_match.start()]}LIMIT {max_rows} {offset_match.group(0)}"
+    else:
+        query = f"{query} LIMIT {max_rows}"
+
+    return query
+
+
+def format_result(df, max_chars=CHAT_SQL_MAX_RESULT_CHARS):
+    """Render a result frame as compact CSV text for the model, truncated to max_chars"""
+    if df.empty:
+        return "The query returned no rows."
+    text = df.to_csv(index=False)
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit("\n", 1)[0] + "\n... (truncated)"
+    return f"{len(df)} rows:\n{text}"
+
+
+def run_sql_tool(sql):
+    """
+    Validate and execute a model-proposed query.
+    Returns (normalized_query, result_df, result_text); result_df is None if the query was rejected.
+    """
+    try:
+        query = validate_sql(sql)
+    except SqlValidationError as e:
+        return sql, None, f"Query rejected: {e}. Fix the query or answer without data."
+
+    # load_data keys its cache on normalized text, so re-phrased duplicates are served from cache
+    try:
+        df = load_data_guarded(query, limit=CHAT_SQL_MAX_ROWS)
+    except QueryCostError as e:
+        return query, None, f"Query rejected: {e}. Rewrite the query to scan less data or answer without data."
+    return query, df, format_result(df)
@@ -39,25 +39,29 @@ CUSTOM_CSS = """
         box-shadow: 0 4px 12px rgba(29, 185, 84, 0.4);
     }
     
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {
+    /* Tab navigation styling (only the nav radio, not radios inside the tabs) */
+    .st-key-nav .stRadio [role="radiogroup"] {
         gap: 8px;
         background-color: #f0f2f6;
         padding: 10px;
         border-radius: 10px;
     }
     
-    .stTabs [data-baseweb="tab"] {
+    .st-key-nav .stRadio [role="radiogroup"] label {
         border-radius: 10px;
         padding: 10px 20px;
         font-weight: 600;
     }
     
-    .stTabs [aria-selected="true"] {
+    .st-key-nav .stRadio [role="radiogroup"] label:has(input:checked) {
         background: linear-gradient(90deg, #1DB954 0%, #1ed760 100%);
         color: white;
     }
     
+    .st-key-nav .stRadio [role="radiogroup"] label > div:first-child {
+        display: none;
+    }
+    
     /* Metric cards */
     [data-testid="stMetricValue"] {
         font-size: 2rem;
@@ -1,16 +1,24 @@
 """
 Tab modules for the Spotify Analytics Dashboard
+Modules are imported on first attribute access so unused tabs stay unloaded
 """
 
-from .top_artists_year import render_top_artists_year_tab
-from .top_songs_day import render_top_songs_day_tab
-from .top_artists_region import render_top_artists_region_tab
-from .chatbot import render_chatbot_tab
+import importlib
 
-__all__ = [
-    'render_top_artists_year_tab',
-    'render_top_songs_day_tab',
-    'render_top_artists_region_tab',
-    'render_chatbot_tab'
-]
+# Render function -> defining module
+_TAB_MODULES = {
+    'render_top_artists_year_tab': '.top_artists_year',
+    'render_top_songs_day_tab': '.top_songs_day',
+    'render_top_artists_region_tab': '.top_artists_region',
+    'render_artist_trajectory_tab': '.artist_trajectory',
+    'render_chatbot_tab': '.chatbot'
+}
 
+__all__ = list(_TAB_MODULES)
+
+
+def __getattr__(name):
+    if name in _TAB_MODULES:
+        module = importlib.import_module(_TAB_MODULES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,146 @@
+"""
+Tab: Artist Trajectory
+Shows an artist's daily streams, rolling totals and rank history in a region
+"""
+
+import streamlit as st
+from datetime import date
+
+from config import CATALOG, SCHEMA, TRAJECTORY_MAX_ROWS
+from charts import prepare_series_frame, line_chart_spec
+from export import render_export
+from search_index import search_box
+from utils import load_data, persistent_widget, sql_literal
+
+
+@st.fragment
+def render_artist_trajectory_tab():
+    """Render the Artist Trajectory tab"""
+    st.markdown("## 📈 Artist Trajectory")
+    st.markdown("##### Follow an artist's streams and chart rank over time")
+    st.markdown("")
+    
+    col1, col2 = st.columns([1, 3])
+    
+    with col1:
+        artist = search_box("🔎 Search artist", key="trajectory_artist", kind='artist')
+        
+        # Load the regions (and their date ranges) the artist charted in
+        if st.button("🔄 Load Artist", key="load_trajectory_artist"):
+            if artist:
+                with st.spinner("Loading regions..."):
+                    regions_query = f"""
+                    SELECT
+                        region,
+                        MIN(chart_date) as first_date,
+                        MAX(chart_date) as last_date
+                    FROM {CATALOG}.{SCHEMA}.artist_daily_trajectory
+                    WHERE artist = {sql_literal(artist)}
+                    GROUP BY region
+                    ORDER BY SUM(daily_streams) DESC
+                    """
+                    regions_df = load_data(regions_query, limit=1000)
+                    if not regions_df.empty:
+                        st.session_state['trajectory_regions'] = regions_df.set_index('region')
+                        st.session_state['trajectory_artist_loaded'] = artist
+                        st.success(f"Found {artist} in {len(regions_df)} regions")
+                    else:
+                        st.session_state.pop('trajectory_regions', None)
+                        st.error(f"No chart history found for '{artist}'.")
+        
+        # Show region and date range selectors
+        if 'trajectory_regions' in st.session_state:
+            regions = st.session_state['trajectory_regions']
+            region = st.selectbox(
+                "Select region",
+                options=regions.index.tolist(),
+                key=persistent_widget("trajectory_region")
+            )
+            first_date = date.fromisoformat(str(regions.loc[region, 'first_date'])[:10])
+            last_date = date.fromisoformat(str(regions.loc[region, 'last_date'])[:10])
+            # Default to the region's full history whenever the region changes
+            if st.session_state.get('trajectory_dates_region') != region:
+                st.session_state['trajectory_dates'] = (first_date, last_date)
+                st.session_state['trajectory_dates_region'] = region
+            date_range = st.date_input(
+                "Date range",
+                min_value=first_date,
+                max_value=last_date,
+                key=persistent_widget("trajectory_dates")
+            )
+        else:
+            st.info("👆 Search for an artist and click 'Load Artist' first")
+            region = None
+            date_range = ()
+        
+        if st.button("Show Trajectory", key="load_trajectory"):
+            if region and len(date_range) == 2:
+                with st.spinner("Loading trajectory..."):
+                    start_date, end_date = date_range
+                    query = f"""
+                    SELECT
+                        chart_date,
+                        daily_streams,
+                        streams_7d,
+                        streams_28d,
+                        best_rank
+                    FROM {CATALOG}.{SCHEMA}.artist_daily_trajectory
+                    WHERE artist = {sql_literal(st.session_state['trajectory_artist_loaded'])}
+                      AND region = {sql_literal(region)}
+                      AND chart_date BETWEEN '{start_date}' AND '{end_date}'
+                    ORDER BY chart_date
+                    """
+                    df = load_data(query, limit=TRAJECTORY_MAX_ROWS)
+                    
+                    if not df.empty:
+                        series_df, version = prepare_series_frame(
+                            df, 'chart_date', ('daily_streams', 'streams_7d', 'streams_28d', 'best_rank')
+                        )
+                        st.session_state['trajectory_df'] = series_df
+                        st.session_state['trajectory_version'] = version
+                        st.session_state['trajectory_query'] = query
+                        st.session_state['trajectory_display'] = f"{st.session_state['trajectory_artist_loaded']} · {region}"
+                    else:
+                        st.error("No data returned.")
+    
+    with col2:
+        if 'trajectory_df' in st.session_state:
+            series_df = st.session_state['trajectory_df']
+            version = st.session_state['trajectory_version']
+            st.markdown(f"## 📈 {st.session_state['trajectory_display']}")
+            
+            labels = {
+                'chart_date': 'Date',
+                'daily_streams': 'Daily Streams',
+                'streams_7d': '7-Day Streams',
+                'streams_28d': '28-Day Streams',
+                'best_rank': 'Best Rank'
+            }
+            window = st.radio(
+                "Streams",
+                options=['daily_streams', 'streams_7d', 'streams_28d'],
+                format_func=labels.get,
+                horizontal=True,
+                key=persistent_widget("trajectory_window")
+            )
+            
+            fig = line_chart_spec(series_df, version, 'chart_date', (window,), labels, height=400)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.markdown("### 🏅 Rank History")
+            fig = line_chart_spec(series_df, version, 'chart_date', ('best_rank',), labels, height=300, reverse_y=True)
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Stats
+            col_a, col_b, col_c = st.columns(3)
+            with col_a:
+                st.metric("Total Streams", f"{series_df['daily_streams'].sum():,.0f}")
+            with col_b:
+                st.metric("Peak Rank", f"#{series_df['best_rank'].min():.0f}")
+            with col_c:
+                st.metric("Days Charted", len(series_df))
+            
+            # Full-resolution daily series, not the downsampled chart points
+            render_export(st.session_state['trajectory_query'], "artist_trajectory", key="export_trajectory")
+        else:
+            st.info("👈 Pick an artist, region and date range, then click 'Show Trajectory'")
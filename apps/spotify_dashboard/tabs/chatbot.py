@@ -6,10 +6,58 @@ Provides an AI-powered chatbot to answer questions about the Spotify data
 import streamlit as st
 from databricks.sdk.service.serving import ChatMessage, ChatMessageRole
 
-from config import CATALOG, SCHEMA, DEFAULT_MODEL_ENDPOINT
-from utils import get_workspace_client
+from config import CATALOG, SCHEMA, DEFAULT_MODEL_ENDPOINT, CHAT_MAX_RESPONSE_TOKENS, CHAT_SQL_MAX_ROUNDS
+from chat_context import SYSTEM_CONTEXT, build_context_messages
+from sql_tool import SQL_TOOL_CONTEXT, extract_sql, strip_sql, run_sql_tool
+from utils import get_workspace_client, persistent_widget
 
 
+def query_chat_endpoint(w, endpoint_name, messages):
+    """Send messages to a Model Serving chat endpoint and return the reply text"""
+    # Convert messages to SDK format
+    sdk_messages = []
+    for msg in messages:
+        role = ChatMessageRole.SYSTEM if msg["role"] == "system" else (
+            ChatMessageRole.USER if msg["role"] == "user" else ChatMessageRole.ASSISTANT
+        )
+        sdk_messages.append(ChatMessage(role=role, content=msg["content"]))
+    
+    # Query the endpoint using SDK (handles auth automatically)
+    response = w.serving_endpoints.query(
+        name=endpoint_name,
+        messages=sdk_messages,
+        max_tokens=CHAT_MAX_RESPONSE_TOKENS,
+        temperature=0.7
+    )
+    
+    # Extract response
+    assistant_message = None
+    
+    if hasattr(response, 'choices') and response.choices and len(response.choices) > 0:
+        assistant_message = response.choices[0].message.content
+    elif hasattr(response, 'predictions'):
+        # Handle dataframe response format
+        if response.predictions and len(response.predictions) > 0:
+            pred = response.predictions[0]
+            if hasattr(pred, 'choices') and pred.choices:
+                assistant_message = pred.choices[0].message.content
+    
+    if not assistant_message:
+        # Try dict access
+        try:
+            if isinstance(response, dict):
+                if 'choices' in response:
+                    assistant_message = response['choices'][0]['message']['content']
+        except:
+            pass
+    
+    if not assistant_message:
+        assistant_message = f"Received response but couldn't extract message. Please check the endpoint format."
+    
+    return assistant_message
+
+
+@st.fragment
 def render_chatbot_tab():
     """Render the AI Chat Assistant tab"""
     st.markdown("## 💬 AI Chat Assistant")
@@ -26,10 +74,16 @@ def render_chatbot_tab():
         # Endpoint configuration
         endpoint_name = st.text_input(
             "🤖 Model Serving Endpoint",
-            value=DEFAULT_MODEL_ENDPOINT,
+            key=persistent_widget("chat_endpoint", DEFAULT_MODEL_ENDPOINT),
             help="Enter your Databricks Model Serving endpoint name"
         )
         
+        use_sql_tool = st.toggle(
+            "🧮 Answer with live data",
+            key=persistent_widget("chat_use_sql", True),
+            help="Let the assistant run read-only SQL against the prod tables and answer from the results"
+        )
+        
         st.markdown("")
         
         # System context about the data
@@ -62,6 +116,9 @@ def render_chatbot_tab():
         for message in st.session_state['chat_messages']:
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
+                for query in message.get("queries", []):
+                    with st.expander("🧮 Query run by the assistant"):
+                        st.code(query, language="sql")
         
         # Chat input
         if prompt := st.chat_input("Ask me about Spotify data..."):
@@ -76,76 +133,60 @@ def render_chatbot_tab():
             with st.chat_message("assistant"):
                 with st.spinner("Thinking..."):
                     try:
-                        # Build context about the data
-                        system_context = f"""You are a helpful AI assistant for Spotify Charts Analytics. 
-                        
-You have access to the following data:
-- Catalog: {CATALOG}, Schema: {SCHEMA}
-- Tables:
-  1. daily_chart_positions: Contains daily chart positions with columns like chart_date, title, artist, rank, region, streams, trend
-  2. monthly_artist_performance: Monthly aggregated metrics with columns like artist, region, year, month, total_streams, avg_rank, best_rank, chart_appearances, unique_songs
-  3. monthly_top_100_artists: Top 100 artists per region per month
-
-When users ask about the data, provide helpful insights. If they ask for specific data queries, explain what SQL query would be needed. Be conversational and helpful."""
-
-                        # Build messages for the API
-                        messages = [
-                            {"role": "system", "content": system_context}
-                        ]
-                        
-                        # Add recent chat history (last 10 messages)
-                        recent_messages = st.session_state['chat_messages'][-10:]
-                        for msg in recent_messages:
-                            messages.append({"role": msg["role"], "content": msg["content"]})
+                        # Build a token-budgeted context: schema prompt, recent turns
+                        # and a summary of anything older
+                        messages = build_context_messages(
+                            st.session_state['chat_messages'],
+                            system_context=SQL_TOOL_CONTEXT if use_sql_tool else SYSTEM_CONTEXT
+                        )
                         
                         # Use the workspace client directly - it handles auth automatically
                         w = get_workspace_client()
+                        assistant_message = query_chat_endpoint(w, endpoint_name, messages)
                         
-                        # Convert messages to SDK format
-                        sdk_messages = []
-                        for msg in messages:
-                            role = ChatMessageRole.SYSTEM if msg["role"] == "system" else (
-                                ChatMessageRole.USER if msg["role"] == "user" else ChatMessageRole.ASSISTANT
-                            )
-                            sdk_messages.append(ChatMessage(role=role, content=msg["content"]))
-                        
-                        # Query the endpoint using SDK (handles auth automatically)
-                        response = w.serving_endpoints.query(
-                            name=endpoint_name,
-                            messages=sdk_messages,
-                            max_tokens=1000,
-                            temperature=0.7
-                        )
-                        
-                        # Extract response
-                        assistant_message = None
-                        
-                        if hasattr(response, 'choices') and response.choices and len(response.choices) > 0:
-                            assistant_message = response.choices[0].message.content
-                        elif hasattr(response, 'predictions'):
-                            # Handle dataframe response format
-                            if response.predictions and len(response.predictions) > 0:
-                                pred = response.predictions[0]
-                                if hasattr(pred, 'choices') and pred.choices:
-                                    assistant_message = pred.choices[0].message.content
-                        
-                        if not assistant_message:
-                            # Try dict access
-                            try:
-                                if isinstance(response, dict):
-                                    if 'choices' in response:
-                                        assistant_message = response['choices'][0]['message']['content']
-                            except:
-                                pass
-                        
-                        if not assistant_message:
-                            assistant_message = f"Received response but couldn't extract message. Please check the endpoint format."
+                        # Let the model ground its answer in live data via read-only SQL
+                        executed_queries = []
+                        if use_sql_tool:
+                            seen_results = set()
+                            for _ in range(CHAT_SQL_MAX_ROUNDS):
+                                sql = extract_sql(assistant_message)
+                                if not sql:
+                                    break
+                                
+                                query, result_df, result_text = run_sql_tool(sql)
+                                executed_queries.append(query)
+                                with st.expander("🧮 Query run by the assistant"):
+                                    st.code(query, language="sql")
+                                    if result_df is not None and not result_df.empty:
+                                        st.dataframe(result_df, use_container_width=True)
+                                
+                                # A result the model has already seen ends the tool loop
+                                if result_text in seen_results:
+                                    break
+                                seen_results.add(result_text)
+                                
+                                messages = messages + [
+                                    {"role": "assistant", "content": assistant_message},
+                                    {"role": "user", "content": f"Query results:\n{result_text}\n\nNow answer my original question using these results."}
+                                ]
+                                assistant_message = query_chat_endpoint(w, endpoint_name, messages)
+                            
+                            # Out of rounds or repeating itself: ask for a plain answer rather than
+                            # showing SQL that was never run
+                            if extract_sql(assistant_message):
+                                messages = messages + [
+                                    {"role": "assistant", "content": assistant_message},
+                                    {"role": "user", "content": "No more queries can be run. Answer my original question in plain language using the results you already have, without SQL."}
+                                ]
+                                assistant_message = strip_sql(query_chat_endpoint(w, endpoint_name, messages)) or \
+                                    "I couldn't answer this from the data within the query limit. Try a more specific question."
                         
                         # Display and save response
                         st.markdown(assistant_message)
                         st.session_state['chat_messages'].append({
                             "role": "assistant", 
-                            "content": assistant_message
+                            "content": assistant_message,
+                            "queries": executed_queries
                         })
                         
                     except Exception as e:
@@ -4,13 +4,13 @@ Shows top artists filtered by region and year
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 
 from config import CATALOG, SCHEMA
-from utils import load_data
+from charts import prepare_ranked_frame, bar_chart_spec
+from utils import load_data, persistent_widget, sql_literal
 
 
+@st.fragment
 def render_top_artists_region_tab():
     """Render the Top Artists by Region tab"""
     st.markdown("## 🌍 Top Artists per Region")
@@ -49,7 +49,7 @@ def render_top_artists_region_tab():
             filter_region = st.selectbox(
                 "Select region",
                 options=st.session_state['available_regions'],
-                key="filter_region"
+                key=persistent_widget("filter_region")
             )
         else:
             st.info("👆 Click 'Load Filters' first")
@@ -60,37 +60,45 @@ def render_top_artists_region_tab():
             filter_year = st.selectbox(
                 "Select year",
                 options=st.session_state['available_years'],
-                key="filter_year"
+                key=persistent_widget("filter_year")
             )
         else:
             filter_year = None
         
         if st.button("Load Top Artists", key="load_top"):
             with st.spinner("Loading data..."):
-                where_clauses = []
-                
+                # Every filter combination is a pre-aggregated slice of the cube;
+                # "All" selections map to the rolled-up rows
+                # grouping_level bits: region rolled up = 4, year = 2, month = 1
+                grouping_level = 1
                 if filter_region and filter_region != 'All':
-                    where_clauses.append(f"region = '{filter_region}'")
-                
+                    region_key = filter_region
+                else:
+                    region_key = 'All'
+                    grouping_level += 4
                 if filter_year and filter_year != 'All':
-                    where_clauses.append(f"year = {filter_year}")
-                
-                where_clause = ""
-                if where_clauses:
-                    where_clause = "WHERE " + " AND ".join(where_clauses)
+                    year_clause = f"year = {filter_year}"
+                else:
+                    year_clause = "year IS NULL"
+                    grouping_level += 2
                 
                 query = f"""
                 SELECT 
                     artist,
                     total_streams
-                FROM {CATALOG}.{SCHEMA}.monthly_top_100_artists
-                {where_clause}
-                ORDER BY total_streams DESC
+                FROM {CATALOG}.{SCHEMA}.artist_rankings_cube
+                WHERE grouping_level = {grouping_level}
+                  AND region = {sql_literal(region_key)}
+                  AND {year_clause}
+                  AND month IS NULL
+                ORDER BY rank_in_group
                 """
                 df = load_data(query, limit=100)
                 
                 if not df.empty:
-                    st.session_state['top_df'] = df
+                    ranked_df, version = prepare_ranked_frame(df, 'total_streams')
+                    st.session_state['top_df'] = ranked_df
+                    st.session_state['top_df_version'] = version
                 else:
                     st.error("No data returned. Check if tables exist.")
     
@@ -99,29 +107,21 @@ def render_top_artists_region_tab():
             # Show only the chart
             if not st.session_state['top_df'].empty and len(st.session_state['top_df']) > 0:
                 # Get top N based on user preference
-                display_count = st.slider("Number of artists to display", 5, 50, 10, key="display_count")
-                top_artists = st.session_state['top_df'].head(display_count)
-                
-                # Convert total_streams to numeric
-                top_artists['total_streams'] = pd.to_numeric(top_artists['total_streams'], errors='coerce')
+                display_count = st.slider("Number of artists to display", 5, 50, key=persistent_widget("display_count", 10))
                 
                 st.markdown(f"### 📊 Top {display_count} Artists by Total Streams")
                 st.info(f"Total artists found: {len(st.session_state['top_df'])}")
                 
-                fig = px.bar(
-                    top_artists,
-                    x='artist',
-                    y='total_streams',
-                    labels={'total_streams': 'Total Streams', 'artist': 'Artist'},
-                    color='total_streams',
-                    color_continuous_scale='blues',
-                    height=600
-                )
-                fig.update_layout(
-                    xaxis_tickangle=-45,
-                    showlegend=False,
-                    xaxis_title="Artist",
-                    yaxis_title="Total Streams"
+                fig = bar_chart_spec(
+                    st.session_state['top_df'],
+                    st.session_state['top_df_version'],
+                    category_col='artist',
+                    value_col='total_streams',
+                    display_count=display_count,
+                    horizontal=False,
+                    color_scale='blues',
+                    height=600,
+                    labels={'total_streams': 'Total Streams', 'artist': 'Artist'}
                 )
                 st.plotly_chart(fig, use_container_width=True)
         else:
@@ -4,13 +4,14 @@ Shows global top artists for a selected year
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 
 from config import CATALOG, SCHEMA
-from utils import load_data
+from charts import prepare_ranked_frame, bar_chart_spec
+from export import render_export
+from utils import load_data, persistent_widget
 
 
+@st.fragment
 def render_top_artists_year_tab():
     """Render the Top Artists by Year tab"""
     st.markdown("## 🎵 Global Top Artists by Year")
@@ -38,29 +39,49 @@ def render_top_artists_year_tab():
             selected_year = st.selectbox(
                 "Select year",
                 options=st.session_state['available_years_tab1'],
-                key="year_tab1"
+                key=persistent_widget("year_tab1")
             )
         else:
             st.info("👆 Click 'Load Years' first")
             selected_year = None
         
+        use_sketches = st.toggle(
+            "⚡ Approximate (sketches)",
+            key=persistent_widget("approx_year"),
+            help="Answer from pre-merged HyperLogLog sketches; adds an approximate unique-songs count without rescanning daily data"
+        )
+        
         if st.button("Show Top Artists", key="load_year_artists"):
             if selected_year:
                 with st.spinner("Loading top artists..."):
-                    query = f"""
-                    SELECT 
-                        artist,
-                        SUM(total_streams) as total_streams
-                    FROM {CATALOG}.{SCHEMA}.monthly_artist_performance
-                    WHERE year = {selected_year}
-                    GROUP BY artist
-                    ORDER BY total_streams DESC
-                    LIMIT 50
-                    """
+                    if use_sketches:
+                        query = f"""
+                        SELECT 
+                            artist,
+                            SUM(total_streams) as total_streams,
+                            hll_sketch_estimate(hll_union_agg(song_sketch)) as unique_songs
+                        FROM {CATALOG}.{SCHEMA}.monthly_artist_sketches
+                        WHERE year = {selected_year}
+                        GROUP BY artist
+                        ORDER BY total_streams DESC
+                        """
+                    else:
+                        query = f"""
+                        SELECT 
+                            artist,
+                            SUM(total_streams) as total_streams
+                        FROM {CATALOG}.{SCHEMA}.monthly_artist_performance
+                        WHERE year = {selected_year}
+                        GROUP BY artist
+                        ORDER BY total_streams DESC
+                        """
                     df = load_data(query, limit=50)
                     
                     if not df.empty:
-                        st.session_state['year_artists_df'] = df
+                        ranked_df, version = prepare_ranked_frame(df, 'total_streams', extra_numeric_cols=('unique_songs',))
+                        st.session_state['year_artists_df'] = ranked_df
+                        st.session_state['year_artists_version'] = version
+                        st.session_state['year_artists_query'] = query
                         st.session_state['selected_year_display'] = selected_year
                     else:
                         st.error("No data returned.")
@@ -70,27 +91,22 @@ def render_top_artists_year_tab():
             st.markdown(f"## 🏆 Top Artists of {st.session_state['selected_year_display']}")
             
             # Slider for display count
-            display_count = st.slider("Number of artists to display", 5, 50, 20, key="display_year")
-            top_artists = st.session_state['year_artists_df'].head(display_count)
+            display_count = st.slider("Number of artists to display", 5, 50, key=persistent_widget("display_year", 20))
+            ranked_df = st.session_state['year_artists_df']
+            top_artists = ranked_df.head(display_count)
+            has_sketch_estimates = 'unique_songs' in ranked_df.columns
             
-            # Convert to numeric
-            top_artists['total_streams'] = pd.to_numeric(top_artists['total_streams'], errors='coerce')
-            
-            fig = px.bar(
-                top_artists,
-                y='artist',
-                x='total_streams',
-                orientation='h',
-                labels={'total_streams': 'Total Streams', 'artist': 'Artist'},
-                color='total_streams',
-                color_continuous_scale='purples',
-                height=max(400, display_count * 25)
-            )
-            fig.update_layout(
-                showlegend=False,
-                yaxis={'categoryorder':'total ascending'},
-                xaxis_title="Total Streams",
-                yaxis_title=""
+            fig = bar_chart_spec(
+                ranked_df,
+                st.session_state['year_artists_version'],
+                category_col='artist',
+                value_col='total_streams',
+                display_count=display_count,
+                horizontal=True,
+                color_scale='purples',
+                height=max(400, display_count * 25),
+                labels={'total_streams': 'Total Streams', 'artist': 'Artist', 'unique_songs': 'Unique Songs (≈)'},
+                hover_cols=('unique_songs',) if has_sketch_estimates else ()
             )
             st.plotly_chart(fig, use_container_width=True)
             
@@ -101,6 +117,16 @@ def render_top_artists_year_tab():
                 st.metric("Total Streams (Top Artists)", f"{total_streams:,.0f}")
             with col_b:
                 st.metric("Artists Shown", len(top_artists))
+            
+            # Full ranking for the year, not just the top 50 shown
+            render_export(
+                st.session_state['year_artists_query'],
+                f"top_artists_{st.session_state['selected_year_display']}",
+                key="export_year"
+            )
+            
+            if has_sketch_estimates:
+                st.caption("⚡ Unique song counts are HyperLogLog estimates merged from monthly sketches")
         else:
             st.info("👈 Select a year and click 'Show Top Artists'")
 
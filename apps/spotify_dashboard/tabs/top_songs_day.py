@@ -4,13 +4,14 @@ Shows most streamed songs on a specific date
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 
 from config import CATALOG, SCHEMA
-from utils import load_data
+from charts import prepare_ranked_frame, bar_chart_spec
+from export import render_export
+from utils import load_data, persistent_widget
 
 
+@st.fragment
 def render_top_songs_day_tab():
     """Render the Top Songs by Day tab"""
     st.markdown("## 🎧 Most Streamed Songs on a Specific Day")
@@ -38,7 +39,7 @@ def render_top_songs_day_tab():
             selected_date = st.selectbox(
                 "Select date",
                 options=st.session_state['available_dates'],
-                key="date_tab2"
+                key=persistent_widget("date_tab2")
             )
         else:
             st.info("👆 Click 'Load Available Dates' first")
@@ -57,14 +58,16 @@ def render_top_songs_day_tab():
                     WHERE chart_date = '{selected_date}'
                     GROUP BY title, artist
                     ORDER BY total_streams DESC
-                    LIMIT 50
                     """
                     df = load_data(query, limit=50)
                     
                     if not df.empty:
                         # Create a combined column for display
                         df['song_display'] = df['title'] + ' - ' + df['artist']
-                        st.session_state['day_songs_df'] = df
+                        ranked_df, version = prepare_ranked_frame(df, 'total_streams', extra_numeric_cols=('avg_rank',))
+                        st.session_state['day_songs_df'] = ranked_df
+                        st.session_state['day_songs_version'] = version
+                        st.session_state['day_songs_query'] = query
                         st.session_state['selected_date_display'] = selected_date
                     else:
                         st.error("No data returned.")
@@ -74,27 +77,20 @@ def render_top_songs_day_tab():
             st.markdown(f"## 🎵 Top Songs on {st.session_state['selected_date_display']}")
             
             # Slider for display count
-            display_count = st.slider("Number of songs to display", 5, 50, 20, key="display_day")
-            top_songs = st.session_state['day_songs_df'].head(display_count)
+            display_count = st.slider("Number of songs to display", 5, 50, key=persistent_widget("display_day", 20))
+            ranked_df = st.session_state['day_songs_df']
+            top_songs = ranked_df.head(display_count)
             
-            # Convert to numeric
-            top_songs['total_streams'] = pd.to_numeric(top_songs['total_streams'], errors='coerce')
-            
-            fig = px.bar(
-                top_songs,
-                y='song_display',
-                x='total_streams',
-                orientation='h',
-                labels={'total_streams': 'Total Streams', 'song_display': 'Song'},
-                color='total_streams',
-                color_continuous_scale='greens',
-                height=max(400, display_count * 30)
-            )
-            fig.update_layout(
-                showlegend=False,
-                yaxis={'categoryorder':'total ascending'},
-                xaxis_title="Total Streams",
-                yaxis_title=""
+            fig = bar_chart_spec(
+                ranked_df,
+                st.session_state['day_songs_version'],
+                category_col='song_display',
+                value_col='total_streams',
+                display_count=display_count,
+                horizontal=True,
+                color_scale='greens',
+                height=max(400, display_count * 30),
+                labels={'total_streams': 'Total Streams', 'song_display': 'Song'}
             )
             st.plotly_chart(fig, use_container_width=True)
             
@@ -108,6 +104,13 @@ def render_top_songs_day_tab():
             with col_c:
                 unique_artists = top_songs['artist'].nunique()
                 st.metric("Unique Artists", unique_artists)
+            
+            # Every charting song of the day, not just the top 50 shown
+            render_export(
+                st.session_state['day_songs_query'],
+                f"top_songs_{st.session_state['selected_date_display']}",
+                key="export_day"
+            )
         else:
             st.info("👈 Select a date and click 'Show Top Songs'")
 
@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+import cost_guard
+import utils
+
+PLAN = """== Optimized Logical Plan ==
+GlobalLimit 50, Statistics(sizeInBytes=4.0 KiB, rowCount=50)
++- Aggregate [artist#1], [artist#1, sum(streams#2) AS s#3], Statistics(sizeInBytes=1.1 GiB, rowCount=2.60E+7)
+   +- Relation spotify_dev.prod_schema.daily_chart_positions[artist#1,streams#2] parquet, Statistics(sizeInBytes=1.5 GiB, rowCount=2.62E+7)
+== Physical Plan ==
+AdaptiveSparkPlan"""
+
+
+def test_parse_explain_cost_sums_leaf_relations():
+    estimate = cost_guard.parse_explain_cost(PLAN)
+    assert estimate["bytes"] == 1.5 * 1024 ** 3
+    assert estimate["rows"] == 2.62e7
+    assert estimate["tables"] == ["spotify_dev.prod_schema.daily_chart_positions"]
+
+
+def test_unknown_size_is_not_an_estimate():
+    assert cost_guard.parse_explain_cost("LocalRelation [x#1], Statistics(sizeInBytes=8.0 EiB)")["bytes"] is None
+
+
+def test_over_budget_query_is_rejected_before_running(monkeypatch):
+    monkeypatch.setattr(cost_guard, "estimate_query_cost", lambda query: cost_guard.parse_explain_cost(PLAN))
+    monkeypatch.setattr(utils, "_execute_query", lambda query: pytest.fail("query ran"))
+    with pytest.raises(cost_guard.QueryCostError, match="monthly_artist_performance"):
+        cost_guard.load_data_guarded("SELECT artist, SUM(streams) FROM daily_chart_positions GROUP BY artist")
+
+
+def test_cache_hits_keep_the_measured_run_time(monkeypatch):
+    query = "SELECT artist FROM monthly_top_100_artists WHERE year = 2098"
+    monkeypatch.setattr(cost_guard, "estimate_query_cost", lambda query: {"bytes": 1000.0, "rows": 10.0, "tables": []})
+    monkeypatch.setattr(utils, "_execute_query", lambda query: (pd.DataFrame({"artist": ["a"]}), None))
+    utils._load_normalized.clear()
+
+    cost_guard.load_data_guarded(query, limit=50)
+    fresh = cost_guard.get_cost_calibration()[0]
+    assert fresh["seconds"] is not None and not fresh["cached"]
+
+    cost_guard.load_data_guarded(query, limit=50)
+    assert cost_guard.get_cost_calibration()[0] == fresh
+
+
+class FakeStatements:
+    """statement_execution stand-in whose EXPLAIN stays PENDING for `pending_polls` polls"""
+
+    def __init__(self, pending_polls):
+        self.pending_polls = pending_polls
+        self.cancelled = []
+
+    def _response(self, state):
+        from databricks.sdk.service.sql import ResultData, StatementResponse, StatementState, StatementStatus
+        return StatementResponse(
+            statement_id="explain-1",
+            status=StatementStatus(state=StatementState[state]),
+            result=ResultData(data_array=[[PLAN]]) if state == "SUCCEEDED" else None
+        )
+
+    def execute_statement(self, **kwargs):
+        return self._response("PENDING")
+
+    def get_statement(self, statement_id):
+        self.pending_polls -= 1
+        return self._response("PENDING" if self.pending_polls > 0 else "SUCCEEDED")
+
+    def cancel_execution(self, statement_id):
+        self.cancelled.append(statement_id)
+
+
+@pytest.fixture
+def fake_explain(monkeypatch):
+    def install(pending_polls):
+        statements = FakeStatements(pending_polls)
+        client = type("Client", (), {"statement_execution": statements})()
+        monkeypatch.setattr(cost_guard, "get_workspace_client", lambda: client)
+        monkeypatch.setattr(cost_guard.time, "sleep", lambda seconds: None)
+        cost_guard.estimate_query_cost.clear()
+        return statements
+    return install
+
+
+def test_pending_explain_is_polled_to_completion(fake_explain):
+    fake_explain(pending_polls=3)
+    assert cost_guard.estimate_query_cost("SELECT 1")["tables"] == ["spotify_dev.prod_schema.daily_chart_positions"]
+
+
+def test_unfinished_explain_is_cancelled_and_the_query_rejected(fake_explain, monkeypatch):
+    statements = fake_explain(pending_polls=10 ** 9)
+    monkeypatch.setattr(cost_guard, "QUERY_COST_EXPLAIN_TIMEOUT_SECONDS", 0)
+    monkeypatch.setattr(utils, "_execute_query", lambda query: pytest.fail("query ran"))
+    with pytest.raises(cost_guard.QueryCostError, match="could not be estimated"):
+        cost_guard.load_data_guarded("SELECT artist FROM monthly_top_100_artists WHERE year = 2097")
+    assert statements.cancelled == ["explain-1"]
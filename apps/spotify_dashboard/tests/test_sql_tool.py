@@ -0,0 +1,82 @@
+import pytest
+
+from sql_tool import SqlValidationError, strip_sql, validate_sql
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM daily_chart_positions, system.information_schema.tables",
+    "SELECT * FROM monthly_top_100_artists a, spotify_dev.main_schema.spotify_charts b",
+    "SELECT * FROM monthly_top_100_artists a JOIN monthly_artist_performance b ON a.artist = b.artist, secret_table",
+    "SELECT * FROM (SELECT artist FROM monthly_top_100_artists) t, `system`.`information_schema`.`tables`",
+    "SELECT * FROM daily_chart_positions WHERE artist IN (SELECT artist FROM other_schema.artists)",
+    "SELECT * FROM read_files('s3://bucket/path')",
+    "SELECT * FROM monthly_top_100_artists, LATERAL (SELECT * FROM system.access.audit)",
+    "SELECT * FROM range(10)",
+    "WITH a AS (SELECT 1) FROM spotify_dev.main_schema.spotify_charts AS b SELECT *",
+    "WITH a AS (SELECT 1) FROM system.access.audit AS b SELECT *",
+    "WITH a AS (SELECT 1), b AS (SELECT 2) FROM system.access.audit AS c SELECT *",
+    "SELECT artist FROM monthly_top_100_artists CROSS JOIN (SELECT 1 AS `q'r`) z "
+    "UNION ALL SELECT email FROM system.access.audit WHERE 'c' = 'c'",
+])
+def test_rejects_tables_outside_allow_list(sql):
+    with pytest.raises(SqlValidationError, match="Table not allowed"):
+        validate_sql(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT secret('scope', 'key') FROM monthly_top_100_artists",
+    "SELECT artist, ai_query('endpoint', artist) FROM monthly_top_100_artists",
+    "SELECT http_request(conn => 'c', method => 'GET', path => '/') FROM monthly_top_100_artists",
+    "SELECT SECRET ('scope', 'key') FROM monthly_top_100_artists",
+    "SELECT reflect('java.lang.System', 'getenv') FROM monthly_top_100_artists",
+])
+def test_rejects_forbidden_functions(sql):
+    with pytest.raises(SqlValidationError, match="Function not allowed"):
+        validate_sql(sql)
+
+
+def test_rejects_catalog_functions():
+    with pytest.raises(SqlValidationError, match="built-in functions"):
+        validate_sql("SELECT spotify_dev.prod_schema.my_udf(artist) FROM monthly_top_100_artists")
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM daily_chart_positions",
+    "SELECT * FROM daily_chart_positions; DROP TABLE daily_chart_positions",
+    "SELECT 1",
+])
+def test_rejects_non_queries(sql):
+    with pytest.raises(SqlValidationError):
+        validate_sql(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT a.artist, b.total_streams FROM monthly_top_100_artists a, monthly_artist_performance b WHERE a.artist = b.artist",
+    "SELECT EXTRACT(YEAR FROM chart_date) AS y, COUNT(*) FROM daily_chart_positions GROUP BY 1",
+    "SELECT TRIM(BOTH ' ' FROM UPPER(artist)) FROM spotify_dev.prod_schema.daily_chart_positions",
+    "WITH top AS (SELECT artist FROM monthly_top_100_artists), agg AS (SELECT artist FROM top) SELECT * FROM agg, top",
+    "WITH top AS (SELECT artist FROM monthly_top_100_artists) FROM top SELECT artist",
+    "SELECT artist AS `it's` FROM monthly_top_100_artists WHERE artist <> 'x'",
+    "SELECT artist, ROW_NUMBER() OVER (PARTITION BY year, month ORDER BY total_streams DESC) FROM monthly_artist_performance",
+    "SELECT * FROM daily_chart_positions WHERE title = 'from system.x, y'",
+])
+def test_accepts_allow_listed_queries(sql):
+    assert validate_sql(sql).endswith("LIMIT 50")
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT artist FROM monthly_top_100_artists", "SELECT artist FROM monthly_top_100_artists LIMIT 50"),
+    ("SELECT artist FROM monthly_top_100_artists LIMIT 10", "SELECT artist FROM monthly_top_100_artists LIMIT 10"),
+    ("SELECT artist FROM monthly_top_100_artists LIMIT 500", "SELECT artist FROM monthly_top_100_artists LIMIT 50"),
+    ("SELECT artist FROM monthly_top_100_artists LIMIT 10 OFFSET 5", "SELECT artist FROM monthly_top_100_artists LIMIT 10 OFFSET 5"),
+    ("SELECT artist FROM monthly_top_100_artists LIMIT 500 OFFSET 5", "SELECT artist FROM monthly_top_100_artists LIMIT 50 OFFSET 5"),
+    ("SELECT artist FROM monthly_top_100_artists LIMIT ALL", "SELECT artist FROM monthly_top_100_artists LIMIT 50"),
+    ("SELECT artist FROM monthly_top_100_artists ORDER BY artist OFFSET 5", "SELECT artist FROM monthly_top_100_artists ORDER BY artist LIMIT 50 OFFSET 5"),
+])
+def test_clamps_limit(sql, expected):
+    assert validate_sql(sql) == expected
+
+
+def test_strip_sql_removes_unexecuted_queries():
+    assert strip_sql("Here you go:\n```sql\nSELECT 1\n```") == "Here you go:"
+    assert strip_sql("```sql SELECT 1 ```") == ""
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import utils
+
+
+def test_failed_client_build_is_retried(monkeypatch):
+    calls = []
+
+    def build():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("transient OIDC fetch failure")
+        return "client"
+
+    monkeypatch.setattr(utils, "_client_future", None)
+    monkeypatch.setattr(utils, "_build_workspace_client", build)
+
+    first = utils.start_workspace_client()
+    assert isinstance(first.exception(timeout=5), ConnectionError)
+    # Done callbacks run just after waiters are woken
+    deadline = time.monotonic() + 5
+    while utils._client_future is first and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert utils.start_workspace_client().result(timeout=5) == "client"
+    assert len(calls) == 2
+
+
+def test_normalize_sql_keeps_comment_markers_inside_literals():
+    assert utils.normalize_sql("SELECT *\n FROM t WHERE title = 'Rock -- Live'\nAND x = 1 -- note\n;") == \
+        "SELECT * FROM t WHERE title = 'Rock -- Live' AND x = 1"
+    assert utils.normalize_sql("SELECT 'a /* b */  c' /* real */ FROM t") == "SELECT 'a /* b */  c' FROM t"
+    assert utils.normalize_sql(f"SELECT 1 FROM t WHERE a = {utils.sql_literal('it' + chr(39) + 's -- x')}") == \
+        "SELECT 1 FROM t WHERE a = 'it\\'s -- x'"
+
+
+def test_concurrent_identical_loads_run_once_and_count_coalesced(monkeypatch):
+    import pandas as pd
+
+    query = "SELECT artist FROM monthly_top_100_artists WHERE year = 2099"
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def execute(statement):
+        calls.append(statement)
+        started.set()
+        release.wait(5)
+        return pd.DataFrame({"artist": ["a"]}), None
+
+    monkeypatch.setattr(utils, "_execute_query", execute)
+    utils._load_normalized.clear()
+    before = utils.get_query_stats()
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(utils.load_data(query)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(utils.load_data(query))) for _ in range(7)]
+    for thread in followers:
+        thread.start()
+    # Let the followers reach the cache's per-query lock before the execution finishes
+    time.sleep(0.2)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    after = utils.get_query_stats()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(list(df["artist"]) == ["a"] for df in results)
+    assert after["executions"] - before["executions"] == 1
+    assert after["coalesced"] - before["coalesced"] == 7
@@ -3,17 +3,77 @@ Utility functions for data loading and workspace client management
 """
 
 import streamlit as st
-import pandas as pd
-from databricks.sdk import WorkspaceClient
-from databricks.sdk.service.sql import StatementState
+from concurrent.futures import Future, ThreadPoolExecutor
 import os
+import re
+import threading
+import time
 
 from config import CATALOG, SCHEMA
+from connection import build_workspace_client, call_with_retries, start_warehouse_heartbeat
 
 
 # Get warehouse ID from environment
 WAREHOUSE_ID = os.getenv("WAREHOUSE_ID")
 
+# Background construction of the workspace client (shared by all sessions)
+_client_future = None
+_client_lock = threading.Lock()
+
+# In-flight work keyed by cache key (single_flight, for paths st.cache_data doesn't cover)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Session-state key listing widgets whose values are kept across tab switches
+_PERSISTENT_WIDGETS = "_persistent_widgets"
+
+# Warehouse executions in progress per normalized query. load_data is coalesced by
+# st.cache_data's per-key lock; callers that arrive during an execution and are then
+# served without running it themselves are counted as coalesced.
+_executing = {}
+_load_state = threading.local()
+QUERY_STATS = {"executions": 0, "coalesced": 0}
+
+SQL_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+# String literals and quoted identifiers (kept verbatim) or comments (dropped), in one left-to-right scan
+_SQL_VERBATIM_OR_COMMENT = re.compile(rf"({SQL_STRING_LITERAL.pattern}|`[^`]*`)|/\*.*?\*/|--[^\n]*", re.DOTALL)
+
+
+def _build_workspace_client():
+    # databricks-sdk is heavy to import, so keep it off the first-paint path
+    return build_workspace_client()
+
+
+def _forget_failed_client(future):
+    # A failed build (e.g. a transient auth fetch) must not stick for the life of the process
+    global _client_future
+    if future.exception() is not None:
+        with _client_lock:
+            if _client_future is future:
+                _client_future = None
+
+
+def start_workspace_client():
+    """Start building the Workspace Client in a background thread (idempotent; retried after a failure)"""
+    global _client_future
+    with _client_lock:
+        created = _client_future is None
+        if created:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="workspace-client")
+            _client_future = executor.submit(_build_workspace_client)
+            executor.shutdown(wait=False)
+        future = _client_future
+    # Outside the lock: the callback runs right here if the build has already finished
+    if created:
+        future.add_done_callback(_forget_failed_client)
+    return future
+
+
+def warm_up_warehouse():
+    """Build the client in the background and start the warehouse heartbeat (idempotent)"""
+    start_workspace_client()
+    start_warehouse_heartbeat(lambda: start_workspace_client().result(), WAREHOUSE_ID)
+
 
 @st.cache_resource
 def get_workspace_client():
@@ -23,62 +83,210 @@ def get_workspace_client():
         st.error("Please update `apps/spotify_dashboard/app.yaml` with your SQL Warehouse ID")
         st.info("Get your warehouse ID from: Databricks UI → SQL Warehouses → Click your warehouse → Copy ID from URL")
         st.stop()
-    return WorkspaceClient()
+    return start_workspace_client().result()
 
 
-@st.cache_data(ttl=300)
-def load_data(query, limit=1000):
-    """Load data from Unity Catalog"""
+def persistent_widget(key, default=None):
+    """
+    Register a widget key whose value should survive switching tabs and return it.
+    Only the selected tab is rendered and Streamlit drops the state of widgets a run
+    doesn't render, so keep_widget_state() re-assigns registered keys every run.
+    The initial value comes from `default`; don't also pass value=/index= to the widget.
+    """
+    st.session_state.setdefault(_PERSISTENT_WIDGETS, set()).add(key)
+    if default is not None:
+        st.session_state.setdefault(key, default)
+    return key
+
+
+def keep_widget_state():
+    """Re-assign registered widget values so widgets on hidden tabs keep them; call before any widget"""
+    for key in st.session_state.get(_PERSISTENT_WIDGETS, ()):
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+
+def _collapse_whitespace(pieces):
+    """Join code pieces, squeezing each whitespace run to one space"""
+    return re.sub(r"\s+", " ", "".join(pieces))
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and drop comments/trailing semicolons so equivalent queries share a cache key"""
+    parts = []
+    code = []
+    last_end = 0
+    # Comment markers inside a literal (e.g. 'Rock -- Live') are text, so literals are matched first;
+    # whitespace is collapsed outside literals only
+    for match in _SQL_VERBATIM_OR_COMMENT.finditer(sql):
+        code.append(sql[last_end:match.start()])
+        if match.group(1) is None:
+            code.append(" ")
+        else:
+            parts.append(_collapse_whitespace(code))
+            parts.append(match.group(1))
+            code = []
+        last_end = match.end()
+    code.append(sql[last_end:])
+    parts.append(_collapse_whitespace(code))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def sql_literal(value):
+    """Quote a Python string as a Databricks SQL string literal"""
+    escaped = str(value).replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+def single_flight(key, fn):
+    """
+    Run fn() once per key across concurrent callers: the first caller executes it,
+    callers arriving while it is in flight wait for and share its result.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+    
+    if not leader:
+        return future.result()
+    
     try:
-        w = get_workspace_client()
-        
-        # Add limit to query if not present
-        if "LIMIT" not in query.upper():
-            query = f"{query} LIMIT {limit}"
-        
-        result = w.statement_execution.execute_statement(
-            statement=query,
-            warehouse_id=WAREHOUSE_ID,
-            catalog=CATALOG,
-            schema=SCHEMA,
-            wait_timeout="50s"
-        )
-        
-        if result.status.state == StatementState.SUCCEEDED:
-            if result.result and result.result.data_array:
-                columns = [col.name for col in result.manifest.schema.columns]
-                data = []
-                for row in result.result.data_array:
-                    row_data = []
-                    for cell in row:
-                        # Handle different data types
-                        if isinstance(cell, str):
-                            # Cell is already a string
-                            row_data.append(cell)
-                        elif hasattr(cell, 'str_value'):
-                            # Cell is an object with str_value
-                            if cell.str_value is not None:
-                                row_data.append(cell.str_value)
-                            elif hasattr(cell, 'int_value') and cell.int_value is not None:
-                                row_data.append(cell.int_value)
-                            elif hasattr(cell, 'float_value') and cell.float_value is not None:
-                                row_data.append(cell.float_value)
-                            else:
-                                row_data.append(None)
+        result = fn()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def get_query_stats():
+    """Warehouse executions vs. duplicate executions avoided by coalescing (process-wide)"""
+    with _inflight_lock:
+        return dict(QUERY_STATS, in_flight=sum(_executing.values()))
+
+
+def _execute_query(query):
+    """Run a statement on the warehouse; returns (DataFrame, error message or None)"""
+    import pandas as pd
+    from databricks.sdk.service.sql import StatementState
+    
+    w = get_workspace_client()
+    result = call_with_retries(lambda: w.statement_execution.execute_statement(
+        statement=query,
+        warehouse_id=WAREHOUSE_ID,
+        catalog=CATALOG,
+        schema=SCHEMA,
+        wait_timeout="50s"
+    ))
+    
+    if result.status.state == StatementState.SUCCEEDED:
+        if result.result and result.result.data_array:
+            columns = [col.name for col in result.manifest.schema.columns]
+            data = []
+            for row in result.result.data_array:
+                row_data = []
+                for cell in row:
+                    # Handle different data types
+                    if isinstance(cell, str):
+                        # Cell is already a string
+                        row_data.append(cell)
+                    elif hasattr(cell, 'str_value'):
+                        # Cell is an object with str_value
+                        if cell.str_value is not None:
+                            row_data.append(cell.str_value)
+                        elif hasattr(cell, 'int_value') and cell.int_value is not None:
+                            row_data.append(cell.int_value)
+                        elif hasattr(cell, 'float_value') and cell.float_value is not None:
+                            row_data.append(cell.float_value)
                         else:
-                            # Unknown type, convert to string
-                            row_data.append(str(cell) if cell is not None else None)
-                    data.append(row_data)
-                return pd.DataFrame(data, columns=columns)
-            return pd.DataFrame()
-        else:
-            error_msg = f"Query failed: {result.status.state}"
-            if result.status.error:
-                error_msg += f"\n{result.status.error.message}"
+                            row_data.append(None)
+                    else:
+                        # Unknown type, convert to string
+                        row_data.append(str(cell) if cell is not None else None)
+                data.append(row_data)
+            return pd.DataFrame(data, columns=columns), None
+        return pd.DataFrame(), None
+    
+    error_msg = f"Query failed: {result.status.state}"
+    if result.status.error:
+        error_msg += f"\n{result.status.error.message}"
+    return pd.DataFrame(), error_msg
+
+
+def _timed_execute(query):
+    """_execute_query, counted and timed; the timing is left on the calling thread's load state"""
+    _load_state.executed = True
+    with _inflight_lock:
+        QUERY_STATS["executions"] += 1
+        _executing[query] = _executing.get(query, 0) + 1
+    started = time.perf_counter()
+    try:
+        result = _execute_query(query)
+    finally:
+        with _inflight_lock:
+            if _executing[query] == 1:
+                del _executing[query]
+            else:
+                _executing[query] -= 1
+    _load_state.seconds = time.perf_counter() - started
+    return result
+
+
+@st.cache_data(ttl=300)
+def _load_normalized(query):
+    """
+    Cached execution of an already-normalized query. On a miss st.cache_data holds a
+    per-query lock, so identical concurrent calls wait for this one and share its result.
+    """
+    import pandas as pd
+    
+    try:
+        df, error_msg = _timed_execute(query)
+        if error_msg:
             st.error(error_msg)
             st.code(query, language="sql")
-            return pd.DataFrame()
+        return df
     except Exception as e:
         st.error(f"Error: {str(e)}")
         return pd.DataFrame()
 
+
+def prepare_query(query, limit=1000):
+    """The exact statement load_data runs: normalized, with a LIMIT added if missing"""
+    query = normalize_sql(query)
+    
+    # Add limit to query if not present
+    if "LIMIT" not in query.upper():
+        query = f"{query} LIMIT {limit}"
+    return query
+
+
+def load_prepared(query):
+    """
+    Load an already-prepared query (see prepare_query).
+    Returns (DataFrame, seconds): the warehouse run time of this call's execution,
+    or None if the result was served from cache.
+    """
+    with _inflight_lock:
+        joined = query in _executing
+    _load_state.executed = False
+    _load_state.seconds = None
+    df = _load_normalized(query)
+    if joined and not _load_state.executed:
+        # Arrived while the same query was running and was served by that execution
+        with _inflight_lock:
+            QUERY_STATS["coalesced"] += 1
+    return df, _load_state.seconds
+
+
+def load_data(query, limit=1000):
+    """Load data from Unity Catalog"""
+    df, _ = load_prepared(prepare_query(query, limit))
+    return df
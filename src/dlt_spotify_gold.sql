@@ -7,36 +7,147 @@
 -- COMMAND ----------
 
 -- MAGIC %md
--- MAGIC ## Silver Layer: Daily Chart Positions (Cleaned)
+-- MAGIC ## Data Quality: Rule Evaluation (Single Pass over Bronze)
+-- MAGIC 
+-- MAGIC Every bronze row is parsed once and checked against all rules in the same projection.
+-- MAGIC `failed_rules` holds the reason code of each rule the row breaks (empty array = clean row):
+-- MAGIC 
+-- MAGIC | Reason code | Rule |
+-- MAGIC |-------------|------|
+-- MAGIC | `missing_title` | title is not null |
+-- MAGIC | `missing_artist` | artist is not null |
+-- MAGIC | `missing_rank` / `unparseable_rank` | rank is present and an integer |
+-- MAGIC | `rank_out_of_range` | rank between 1 and 200 |
+-- MAGIC | `missing_date` / `unparseable_date` | date is present and a valid date |
+-- MAGIC | `unparseable_streams` | streams, when present, is an integer |
+-- MAGIC | `negative_streams` | streams >= 0 |
 
 -- COMMAND ----------
 
-CREATE OR REFRESH LIVE TABLE daily_chart_positions
-COMMENT "Silver layer: Daily chart positions with cleaned data and formatted dates"
-TBLPROPERTIES ("quality" = "silver", "pipelines.autoOptimize.managed" = "true")
+CREATE OR REFRESH TEMPORARY LIVE TABLE chart_positions_checked
+COMMENT "Bronze chart rows parsed once and tagged with the reason codes of every failed quality rule"
 AS 
-WITH source_data AS (
+WITH parsed AS (
   SELECT
     title,
-    CAST(rank AS INT) AS rank,
-    CAST(date AS DATE) AS chart_date,
-    YEAR(date) AS year,
-    MONTH(date) AS month,
-    DAYOFMONTH(date) AS day,
+    TRY_CAST(rank AS INT) AS rank,
+    TRY_CAST(date AS DATE) AS chart_date,
     artist,
     url,
     region,
     trend,
-    CAST(streams AS BIGINT) AS streams,
-    CURRENT_TIMESTAMP() AS processed_timestamp
+    TRY_CAST(streams AS BIGINT) AS streams,
+    rank AS raw_rank,
+    date AS raw_date,
+    streams AS raw_streams
   FROM spotify_dev.main_schema.spotify_charts
 )
-SELECT *
-FROM source_data
-WHERE title IS NOT NULL
-  AND rank IS NOT NULL
-  AND chart_date IS NOT NULL
-  AND artist IS NOT NULL;
+SELECT
+  title,
+  rank,
+  chart_date,
+  YEAR(chart_date) AS year,
+  MONTH(chart_date) AS month,
+  DAYOFMONTH(chart_date) AS day,
+  artist,
+  url,
+  region,
+  trend,
+  streams,
+  CAST(raw_rank AS STRING) AS raw_rank,
+  CAST(raw_date AS STRING) AS raw_date,
+  CAST(raw_streams AS STRING) AS raw_streams,
+  FILTER(
+    ARRAY(
+      CASE WHEN title IS NULL THEN 'missing_title' END,
+      CASE WHEN artist IS NULL THEN 'missing_artist' END,
+      CASE WHEN raw_rank IS NULL THEN 'missing_rank' END,
+      CASE WHEN raw_rank IS NOT NULL AND rank IS NULL THEN 'unparseable_rank' END,
+      CASE WHEN rank NOT BETWEEN 1 AND 200 THEN 'rank_out_of_range' END,
+      CASE WHEN raw_date IS NULL THEN 'missing_date' END,
+      CASE WHEN raw_date IS NOT NULL AND chart_date IS NULL THEN 'unparseable_date' END,
+      CASE WHEN raw_streams IS NOT NULL AND streams IS NULL THEN 'unparseable_streams' END,
+      CASE WHEN streams < 0 THEN 'negative_streams' END
+    ),
+    reason -> reason IS NOT NULL
+  ) AS failed_rules
+FROM parsed;
+
+-- COMMAND ----------
+
+-- MAGIC %md
+-- MAGIC ## Silver Layer: Daily Chart Positions (Cleaned)
+
+-- COMMAND ----------
+
+CREATE OR REFRESH LIVE TABLE daily_chart_positions
+COMMENT "Silver layer: Daily chart positions with cleaned data and formatted dates"
+TBLPROPERTIES ("quality" = "silver", "pipelines.autoOptimize.managed" = "true")
+AS SELECT
+  title,
+  rank,
+  chart_date,
+  year,
+  month,
+  day,
+  artist,
+  url,
+  region,
+  trend,
+  streams,
+  CURRENT_TIMESTAMP() AS processed_timestamp
+FROM LIVE.chart_positions_checked
+WHERE SIZE(failed_rules) = 0;
+
+-- COMMAND ----------
+
+-- MAGIC %md
+-- MAGIC ## Quarantine: Rows Failing Quality Rules
+
+-- COMMAND ----------
+
+CREATE OR REFRESH LIVE TABLE quarantined_chart_positions
+COMMENT "Quarantine: Bronze chart rows rejected from silver, with the raw values and failed rule reason codes"
+TBLPROPERTIES ("quality" = "quarantine", "pipelines.autoOptimize.managed" = "true")
+AS SELECT
+  title,
+  artist,
+  region,
+  url,
+  trend,
+  raw_rank,
+  raw_date,
+  raw_streams,
+  failed_rules,
+  CURRENT_TIMESTAMP() AS quarantined_timestamp
+FROM LIVE.chart_positions_checked
+WHERE SIZE(failed_rules) > 0;
+
+-- COMMAND ----------
+
+-- MAGIC %md
+-- MAGIC ## Data Quality Metrics: Per-Rule Counts
+
+-- COMMAND ----------
+
+CREATE OR REFRESH LIVE TABLE data_quality_metrics
+COMMENT "Per-run row counts: total, passed, quarantined and failures per quality rule"
+TBLPROPERTIES ("quality" = "metrics", "pipelines.autoOptimize.managed" = "true")
+AS SELECT
+  COUNT(*) AS total_rows,
+  COUNT_IF(SIZE(failed_rules) = 0) AS passed_rows,
+  COUNT_IF(SIZE(failed_rules) > 0) AS quarantined_rows,
+  COUNT_IF(ARRAY_CONTAINS(failed_rules, 'missing_title')) AS missing_title,
+  COUNT_IF(ARRAY_CONTAINS(failed_rules, 'missing_artist')) AS missing_artist,
+  COUNT_IF(ARRAY_CONTAINS(failed_rules, 'missing_rank')) AS missing_rank,
+  COUNT_IF(ARRAY_CONTAINS(failed_rules, 'unparseable_rank')) AS unparseable_rank,
+  COUNT_IF(ARRAY_CONTAINS(failed_rules, 'rank_out_of_range')) AS rank_out_of_range,
+  COUNT_IF(ARRAY_CONTAINS(failed_rules, 'missing_date')) AS missing_date,
+  COUNT_IF(ARRAY_CONTAINS(failed_rules, 'unparseable_date')) AS unparseable_date,
+  COUNT_IF(ARRAY_CONTAINS(failed_rules, 'unparseable_streams')) AS unparseable_streams,
+  COUNT_IF(ARRAY_CONTAINS(failed_rules, 'negative_streams')) AS negative_streams,
+  CURRENT_TIMESTAMP() AS measured_timestamp
+FROM LIVE.chart_positions_checked;
 
 -- COMMAND ----------
 
@@ -97,3 +208,186 @@ AS SELECT
 FROM LIVE.monthly_artist_performance
 QUALIFY rank_in_region <= 100;
 
+
+-- COMMAND ----------
+
+-- MAGIC %md
+-- MAGIC ## Gold Layer: Monthly Artist Sketches (Approximate Analytics)
+-- MAGIC 
+-- MAGIC Mergeable per (artist, region, year, month) summaries so yearly, global and multi-region rollups
+-- MAGIC can be answered without rescanning `daily_chart_positions`:
+-- MAGIC - `song_sketch`: HyperLogLog sketch of distinct titles, merge with `hll_union_agg` and read with `hll_sketch_estimate`
+-- MAGIC - `top_tracks`: the 10 most-streamed titles of the cell, merge by exploding and re-summing (approximate top-K)
+
+-- COMMAND ----------
+
+CREATE OR REFRESH LIVE TABLE monthly_artist_sketches
+COMMENT "Gold layer: Mergeable HLL and top-K track sketches per artist, region and month for approximate rollups"
+TBLPROPERTIES ("quality" = "gold", "pipelines.autoOptimize.managed" = "true")
+AS 
+WITH track_streams AS (
+  SELECT
+    artist,
+    region,
+    year,
+    month,
+    title,
+    SUM(streams) AS streams,
+    COUNT(*) AS chart_appearances
+  FROM LIVE.daily_chart_positions
+  GROUP BY artist, region, year, month, title
+)
+SELECT
+  artist,
+  region,
+  year,
+  month,
+  SUM(streams) AS total_streams,
+  SUM(chart_appearances) AS chart_appearances,
+  hll_sketch_agg(title) AS song_sketch,
+  SLICE(
+    TRANSFORM(
+      ARRAY_SORT(
+        COLLECT_LIST(NAMED_STRUCT('streams', COALESCE(streams, 0), 'title', title)),
+        (l, r) -> CASE WHEN l.streams > r.streams THEN -1 WHEN l.streams < r.streams THEN 1 ELSE 0 END
+      ),
+      t -> NAMED_STRUCT('title', t.title, 'streams', t.streams)
+    ),
+    1, 10
+  ) AS top_tracks,
+  CURRENT_TIMESTAMP() AS last_updated
+FROM track_streams
+GROUP BY artist, region, year, month;
+
+-- COMMAND ----------
+
+-- MAGIC %md
+-- MAGIC ## Gold Layer: Artist Rankings Cube (Region × Year × Month)
+-- MAGIC 
+-- MAGIC Pre-aggregated, pre-ranked top 100 artists for every filter combination.
+-- MAGIC Rolled-up dimensions are `region = 'All'` and `year` / `month` = NULL, so e.g. all regions for 2019 is
+-- MAGIC `WHERE region = 'All' AND year = 2019 AND month IS NULL ORDER BY rank_in_group`.
+-- MAGIC `'All'` sums the country charts only: the `Global` chart already counts those streams, so it is kept as
+-- MAGIC its own region but left out of the rollup. `grouping_level` (`GROUPING_ID(region, year, month)`) tells a
+-- MAGIC rollup row from a real region with the same name.
+
+-- COMMAND ----------
+
+CREATE OR REFRESH LIVE TABLE artist_rankings_cube
+COMMENT "Gold layer: Top 100 artists at every region/year/month rollup level, pre-aggregated and ranked by total streams"
+TBLPROPERTIES ("quality" = "gold", "pipelines.autoOptimize.managed" = "true")
+AS 
+WITH per_region AS (
+  SELECT
+    artist,
+    region,
+    year,
+    month,
+    SUM(total_streams) AS total_streams,
+    SUM(chart_appearances) AS chart_appearances,
+    SUM(avg_rank * chart_appearances) / SUM(chart_appearances) AS avg_rank,
+    MIN(best_rank) AS best_rank,
+    GROUPING_ID(year, month) AS grouping_level
+  FROM LIVE.monthly_artist_performance
+  GROUP BY artist, region, GROUPING SETS (
+    (year, month),
+    (year),
+    ()
+  )
+),
+all_regions AS (
+  SELECT
+    artist,
+    'All' AS region,
+    year,
+    month,
+    SUM(total_streams) AS total_streams,
+    SUM(chart_appearances) AS chart_appearances,
+    SUM(avg_rank * chart_appearances) / SUM(chart_appearances) AS avg_rank,
+    MIN(best_rank) AS best_rank,
+    4 + GROUPING_ID(year, month) AS grouping_level
+  FROM LIVE.monthly_artist_performance
+  -- Global is Spotify's own worldwide chart; adding it to the country charts would count streams twice
+  WHERE region <> 'Global'
+  GROUP BY artist, GROUPING SETS (
+    (year, month),
+    (year),
+    ()
+  )
+),
+rollups AS (
+  SELECT * FROM per_region
+  UNION ALL
+  SELECT * FROM all_regions
+)
+SELECT
+  artist,
+  region,
+  year,
+  month,
+  total_streams,
+  chart_appearances,
+  avg_rank,
+  best_rank,
+  grouping_level,
+  ROW_NUMBER() OVER (
+    PARTITION BY grouping_level, region, year, month
+    ORDER BY total_streams DESC
+  ) AS rank_in_group,
+  CURRENT_TIMESTAMP() AS last_updated
+FROM rollups
+QUALIFY rank_in_group <= 100;
+
+-- COMMAND ----------
+
+-- MAGIC %md
+-- MAGIC ## Gold Layer: Artist Daily Trajectory (Rolling Windows)
+-- MAGIC 
+-- MAGIC Per artist, region and day: streams, best rank and rolling 7/28-day totals, materialized so the
+-- MAGIC dashboard's trajectory tab is a filtered read instead of window functions over `daily_chart_positions`.
+
+-- COMMAND ----------
+
+CREATE OR REFRESH LIVE TABLE artist_daily_trajectory
+COMMENT "Gold layer: Daily streams, best rank and rolling 7/28-day aggregates per artist and region"
+TBLPROPERTIES (
+  "quality" = "gold",
+  "pipelines.autoOptimize.managed" = "true",
+  "pipelines.autoOptimize.zOrderCols" = "artist,region"
+)
+AS 
+WITH daily AS (
+  SELECT
+    artist,
+    region,
+    chart_date,
+    SUM(streams) AS daily_streams,
+    MIN(rank) AS best_rank,
+    COUNT(*) AS tracks_charted
+  FROM LIVE.daily_chart_positions
+  GROUP BY artist, region, chart_date
+)
+SELECT
+  artist,
+  region,
+  chart_date,
+  daily_streams,
+  best_rank,
+  tracks_charted,
+  SUM(daily_streams) OVER (
+    PARTITION BY artist, region
+    ORDER BY UNIX_DATE(chart_date)
+    RANGE BETWEEN 6 PRECEDING AND CURRENT ROW
+  ) AS streams_7d,
+  SUM(daily_streams) OVER (
+    PARTITION BY artist, region
+    ORDER BY UNIX_DATE(chart_date)
+    RANGE BETWEEN 27 PRECEDING AND CURRENT ROW
+  ) AS streams_28d,
+  MIN(best_rank) OVER (
+    PARTITION BY artist, region
+    ORDER BY UNIX_DATE(chart_date)
+    RANGE BETWEEN 6 PRECEDING AND CURRENT ROW
+  ) AS best_rank_7d,
+  CURRENT_TIMESTAMP() AS last_updated
+FROM daily;
@@ -37,6 +37,19 @@ print(f"Schema '{catalog_name}.{prod_schema_name}' created or already exists")
 
 # COMMAND ----------
 
+# MAGIC %md
+# MAGIC ## Create Kaggle Cache Volume
+# MAGIC Job clusters are ephemeral, so the loader keeps the kagglehub download cache on a Volume. An unchanged
+# MAGIC dataset version is then neither re-downloaded nor re-hashed on the next run.
+
+# COMMAND ----------
+
+cache_volume_name = "kaggle_cache"
+spark.sql(f"CREATE VOLUME IF NOT EXISTS {catalog_name}.{schema_name}.{cache_volume_name}")
+print(f"Volume '{catalog_name}.{schema_name}.{cache_volume_name}' created or already exists")
+
+# COMMAND ----------
+
 # Set the current catalog and schema
 spark.sql(f"USE CATALOG {catalog_name}")
 spark.sql(f"USE SCHEMA {schema_name}")